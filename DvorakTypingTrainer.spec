@@ -6,7 +6,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('coding_templates.json', '.')],
+    datas=[('coding_templates.json', '.'), ('practice_texts.txt', '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,426 @@
+"""키 입력 지연 벤치마크
+
+녹화되었거나 합성한 키 입력 기록(trace)을 입력 경로
+(on_key_press → handle_char_input → update_user_line)에 그대로 재생하고
+키 입력당 지연 백분위수, Tk 호출 수, 메모리 증가량을 측정한다.
+기준 파일(benchmark_baseline.json)보다 나빠지거나, 기준 파일 또는 측정한 항목의 기준이 없거나,
+gui 경로를 측정하지 못하면(--headless 제외) 0이 아닌 코드로 종료한다.
+gui 경로는 기계마다 다른 지연 외에 결정적인 값(Tk 호출 수, 전체 렌더링 수)도 비교하므로
+디스플레이가 없는 곳에서는 xvfb-run 으로 실행한다.
+
+사용법:
+    python benchmark.py                     # 기본 시나리오 측정 및 기준과 비교
+    python benchmark.py --update-baseline   # 현재 결과를 기준 파일로 저장
+    python benchmark.py --trace my.json     # 녹화된 기록 재생
+    python benchmark.py --headless          # Tk 없이 세션 엔진만 측정
+
+trace 형식 (JSON):
+    {"text": "...", "mode": "typing" | "coding", "language": "python",
+     "events": [[시각(ms), keysym, char], ...]}
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import main
+
+BASELINE_FILE = "benchmark_baseline.json"
+# 키 입력 지연은 측정 잡음이 커서 여유를 두고, Tk 호출/렌더링 수는 결정적이라 엄격하게 비교
+LATENCY_TOLERANCE = 0.5
+LATENCY_FLOOR_MS = 0.05
+COUNT_TOLERANCES = {"tk_calls": 0.05, "renders": 0.0}
+MEMORY_TOLERANCE = 0.5
+MEMORY_FLOOR_KB = 256
+
+# (이름, 모드, WPM, 오타율, 줄 길이, 줄 수, 재생할 최대 키 수)
+SCENARIOS = [
+    ("typing_60wpm", "typing", 60, 0.02, 60, 20, 3000),
+    ("typing_120wpm_errors", "typing", 120, 0.08, 80, 50, 3000),
+    ("typing_long_lines", "typing", 100, 0.02, 200, 100, 3000),
+    ("coding_small", "coding", 70, 0.03, 50, 40, 3000),
+    ("coding_large_doc", "coding", 90, 0.05, 80, 2000, 3000),
+]
+
+WORDS = [
+    "the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "typing",
+    "practice", "keyboard", "layout", "dvorak", "speed", "accuracy", "home",
+    "row", "vowel", "left", "right", "hand", "finger", "rhythm", "steady",
+]
+
+
+def synthesize_text(mode, line_length, line_count, rng):
+    """모드와 줄 길이에 맞는 연습 텍스트 생성"""
+    lines = []
+    for i in range(line_count):
+        if mode == "coding":
+            indent = "    " * (i % 3)
+            line = f"{indent}if value_{i} == {i}: return 'item'  # check {i}"
+            while len(line) < line_length:
+                line += f" and {rng.choice(WORDS)}"
+            lines.append(line[:line_length].rstrip())
+        else:
+            words = []
+            while sum(len(w) + 1 for w in words) < line_length:
+                words.append(rng.choice(WORDS))
+            lines.append(" ".join(words)[:line_length].rstrip())
+    return "\n".join(lines)
+
+
+def synthesize_trace(name, mode, wpm, error_rate, line_length, line_count, max_keys, seed=0):
+    """WPM과 오타율을 따르는 합성 키 입력 기록 생성"""
+    rng = random.Random(seed)
+    text = synthesize_text(mode, line_length, line_count, rng)
+    # 1단어 = 5글자 기준 평균 키 간격
+    interval_ms = 60000 / (wpm * 5)
+    events = []
+    now = 0.0
+
+    def press(keysym, char):
+        nonlocal now
+        now += max(10.0, rng.gauss(interval_ms, interval_ms * 0.25))
+        events.append([round(now, 2), keysym, char])
+
+    for line in text.split("\n"):
+        # 선행 공백은 자동 들여쓰기로 채워지므로 입력하지 않음
+        for char in line.lstrip(" "):
+            if len(events) >= max_keys:
+                break
+            if rng.random() < error_rate:
+                press("x", rng.choice("aoeuidhtns"))
+                # 대부분은 바로 고치고 일부는 틀린 채로 진행
+                if rng.random() < 0.7:
+                    press("BackSpace", "")
+                else:
+                    continue
+            press(char if char.isalnum() else "", char)
+    return {
+        "name": name,
+        "text": text,
+        "mode": mode,
+        "language": "python",
+        "events": events[:max_keys],
+    }
+
+
+def load_trace(path):
+    """녹화된 키 입력 기록 로드"""
+    with open(path, "r", encoding="utf-8") as file:
+        trace = json.load(file)
+    trace.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    trace.setdefault("mode", "typing")
+    trace.setdefault("language", "python")
+    return trace
+
+
+def summarize(latencies_ms, counts, memory):
+    latencies_ms = sorted(latencies_ms)
+    growth_kb, peak_kb = memory
+    return {
+        "keys": len(latencies_ms),
+        "p50_ms": round(main.percentile(latencies_ms, 0.50), 4),
+        "p95_ms": round(main.percentile(latencies_ms, 0.95), 4),
+        "p99_ms": round(main.percentile(latencies_ms, 0.99), 4),
+        "max_ms": round(latencies_ms[-1], 4) if latencies_ms else 0.0,
+        **counts,
+        "memory_growth_kb": round(growth_kb, 1),
+        "memory_peak_kb": round(peak_kb, 1),
+    }
+
+
+class KeyEvent:
+    """on_key_press 에 넘길 최소한의 이벤트 객체"""
+
+    __slots__ = ("keysym", "char")
+
+    def __init__(self, keysym, char):
+        self.keysym = keysym
+        self.char = char
+
+
+class CountingTk:
+    """위젯의 tk 인터프리터를 감싸 Tcl 호출 수를 세는 프록시"""
+
+    def __init__(self, tkapp):
+        self.tkapp = tkapp
+        self.calls = 0
+
+    def call(self, *args):
+        self.calls += 1
+        return self.tkapp.call(*args)
+
+    def __getattr__(self, name):
+        return getattr(self.tkapp, name)
+
+
+def instrument_tk(app):
+    """앱의 모든 위젯이 같은 호출 계수 프록시를 쓰도록 교체"""
+    counter = CountingTk(app.root.tk)
+    pending = [app.root]
+    while pending:
+        widget = pending.pop()
+        widget.tk = counter
+        pending.extend(widget.children.values())
+    # 공유 폰트 객체도 Tcl 을 직접 호출함
+    if hasattr(app, "text_font") and hasattr(app.text_font, "_tk"):
+        app.text_font._tk = counter
+    return counter
+
+
+def frames(events, frame_ms):
+    """기록 시각 기준으로 한 프레임에 들어오는 이벤트끼리 묶음"""
+    batch = []
+    frame_end = None
+    for event in events:
+        if frame_end is not None and event[0] >= frame_end:
+            yield batch
+            batch = []
+            frame_end = None
+        if frame_end is None:
+            frame_end = event[0] + frame_ms
+        batch.append(event)
+    if batch:
+        yield batch
+
+
+def replay_headless(trace, measure_memory=False):
+    """Tk 없이 세션 엔진(TypingSession)만으로 재생"""
+    session = main.TypingSession(trace["text"])
+    session.subscribe(lambda kind, line_index: None)
+    session.start()
+    if measure_memory:
+        tracemalloc.start()
+        start_memory = tracemalloc.get_traced_memory()[0]
+    latencies = []
+    for _, keysym, char in trace["events"]:
+        started = time.perf_counter()
+        if keysym == "BackSpace":
+            session.backspace()
+        elif keysym == "Return":
+            session.enter()
+        else:
+            session.feed_char(char)
+        latencies.append((time.perf_counter() - started) * 1000)
+    memory = (0.0, 0.0)
+    if measure_memory:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory = ((current - start_memory) / 1024, (peak - start_memory) / 1024)
+    return latencies, {"tk_calls": 0}, memory
+
+
+def create_app():
+    """측정용 트레이너 생성 (Tk 를 만들 수 없으면 None)"""
+    try:
+        app = main.DvorakTypingTrainer()
+    except main.tk.TclError:
+        return None
+    app.root.withdraw()
+    return app
+
+
+def replay_gui(trace, measure_memory=False):
+    """실제 입력 경로로 재생: 프레임마다 키 처리 후 한 번에 화면 반영"""
+    app = create_app()
+    if app is None:
+        return None
+    try:
+        app.use_dvorak_mapping = False
+        app.is_coding_mode = trace["mode"] == "coding"
+        app.current_language = trace["language"]
+        # 결과 창과 기록 저장은 측정 대상이 아님
+        app.check_completion = lambda: None
+        renders_before = app.render_count
+        app.start_session(trace["text"])
+        counter = instrument_tk(app)
+        counter.calls = 0
+        if measure_memory:
+            tracemalloc.start()
+            start_memory = tracemalloc.get_traced_memory()[0]
+
+        latencies = []
+        for batch in frames(trace["events"], app.frame_budget_ms):
+            handled = []
+            for _, keysym, char in batch:
+                started = time.perf_counter()
+                app.on_key_press(KeyEvent(keysym, char))
+                handled.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            app.flush_render()
+            flush_time = time.perf_counter() - started
+            # 키 처리 시간 + 그 키가 화면에 반영된 프레임의 갱신 시간
+            latencies.extend((elapsed + flush_time) * 1000 for elapsed in handled)
+
+        memory = (0.0, 0.0)
+        if measure_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            memory = ((current - start_memory) / 1024, (peak - start_memory) / 1024)
+        counts = {"tk_calls": counter.calls, "renders": app.render_count - renders_before}
+        return latencies, counts, memory
+    finally:
+        app.root.destroy()
+
+
+def check_render_counts():
+    """세션을 시작하는 경로마다 전체 렌더링(display_text)이 정확히 한 번인지 확인
+
+    실패 목록을 반환하고, Tk 를 만들 수 없으면 None.
+    """
+    app = create_app()
+    if app is None:
+        return None
+    fd, text_path = tempfile.mkstemp(suffix=".txt")
+    with os.fdopen(fd, "w", encoding="utf-8") as file:
+        file.write("render count check\nsecond line")
+    open_dialog = main.filedialog.askopenfilename
+    main.filedialog.askopenfilename = lambda **kwargs: text_path
+    failures = []
+    try:
+        for name in ("start_new_practice", "start_practice_mode", "load_text_from_file"):
+            before = app.render_count
+            getattr(app, name)()
+            renders = app.render_count - before
+            if renders != 1:
+                failures.append(f"{name}: 렌더링 {renders}회 (기대 1회)")
+    finally:
+        main.filedialog.askopenfilename = open_dialog
+        app.root.destroy()
+        os.remove(text_path)
+    return failures
+
+
+def run_trace(trace, paths):
+    """경로별로 지연 측정 1회 + 메모리 측정 1회 (tracemalloc 은 지연을 왜곡함)"""
+    results = {}
+    for path in paths:
+        replay = replay_gui if path == "gui" else replay_headless
+        measured = replay(trace)
+        if measured is None:
+            print(f"  [{path}] Tk 를 만들 수 없어 건너뜀")
+            continue
+        latencies, counts, _ = measured
+        _, _, memory = replay(trace, measure_memory=True)
+        results[path] = summarize(latencies, counts, memory)
+    return results
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def compare(results, baseline, latency_tolerance, paths):
+    """기준 대비 회귀 목록 반환 (측정하지 못했거나 기준이 없는 항목도 실패)"""
+    regressions = []
+    for name, measured in results.items():
+        for path in paths:
+            label = f"{name}/{path}"
+            current = measured.get(path)
+            if current is None:
+                regressions.append(f"{label}: 측정하지 못함 (gui 는 디스플레이 필요, xvfb-run 사용)")
+                continue
+            base = baseline.get(name, {}).get(path)
+            if base is None:
+                regressions.append(f"{label}: 기준 없음 (--update-baseline 으로 추가)")
+                continue
+            for key in ("p95_ms", "p99_ms"):
+                limit = max(base[key] * (1 + latency_tolerance), base[key] + LATENCY_FLOOR_MS)
+                if current[key] > limit:
+                    regressions.append(f"{label}: {key} {base[key]} → {current[key]}")
+            for key, tolerance in COUNT_TOLERANCES.items():
+                if key not in current:
+                    continue
+                if key not in base:
+                    regressions.append(f"{label}: {key} 기준 없음 (--update-baseline 으로 갱신)")
+                elif current[key] > base[key] * (1 + tolerance):
+                    regressions.append(f"{label}: {key} {base[key]} → {current[key]}")
+            memory_limit = base["memory_growth_kb"] * (1 + MEMORY_TOLERANCE) + MEMORY_FLOOR_KB
+            if current["memory_growth_kb"] > memory_limit:
+                regressions.append(
+                    f"{label}: memory_growth_kb {base['memory_growth_kb']} → "
+                    f"{current['memory_growth_kb']}"
+                )
+    return regressions
+
+
+def print_results(results):
+    header = f"{'시나리오':<24}{'경로':<10}{'키':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'Tk 호출':>10}{'렌더링':>8}{'메모리KB':>10}"
+    print(header)
+    for name, paths in results.items():
+        for path, r in paths.items():
+            print(
+                f"{name:<24}{path:<10}{r['keys']:>7}{r['p50_ms']:>9.3f}{r['p95_ms']:>9.3f}"
+                f"{r['p99_ms']:>9.3f}{r['tk_calls']:>10}{r.get('renders', '-'):>8}"
+                f"{r['memory_growth_kb']:>10.1f}"
+            )
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="키 입력 지연 벤치마크")
+    parser.add_argument("--trace", action="append", default=[], help="녹화된 기록(JSON) 재생")
+    parser.add_argument("--headless", action="store_true", help="Tk 경로 생략")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="기준 파일 경로")
+    parser.add_argument("--update-baseline", action="store_true", help="현재 결과를 기준으로 저장")
+    parser.add_argument(
+        "--tolerance", type=float, default=LATENCY_TOLERANCE, help="지연 허용 비율 (기본 0.5)"
+    )
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        traces = [load_trace(path) for path in args.trace]
+    else:
+        traces = [synthesize_trace(*scenario) for scenario in SCENARIOS]
+    paths = ["headless"] if args.headless else ["headless", "gui"]
+
+    results = {}
+    for trace in traces:
+        print(f"측정 중: {trace['name']} ({len(trace['events'])}키)")
+        results[trace["name"]] = run_trace(trace, paths)
+    print()
+    print_results(results)
+
+    render_failures = []
+    if "gui" in paths:
+        render_failures = check_render_counts()
+        if render_failures is None:
+            print("\n[렌더링 횟수] Tk 를 만들 수 없어 건너뜀")
+            render_failures = []
+
+    baseline = load_baseline(args.baseline)
+    if args.update_baseline:
+        # 이번에 측정하지 않은 경로(예: 헤드리스 환경의 gui)의 기준은 유지
+        merged = baseline or {}
+        for name, paths in results.items():
+            merged.setdefault(name, {}).update(paths)
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(merged, file, ensure_ascii=False, indent=2)
+            file.write("\n")
+        print(f"\n기준 파일 저장: {args.baseline}")
+        for line in render_failures:
+            print(f"  - {line}")
+        return 1 if render_failures else 0
+
+    if baseline is None:
+        print(f"\n기준 파일이 없습니다: {args.baseline} (--update-baseline 으로 생성)")
+        return 2
+    print()
+    regressions = compare(results, baseline, args.tolerance, paths) + render_failures
+    if regressions:
+        print("\n성능 회귀 감지:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print("\n기준 대비 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
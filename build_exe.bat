@@ -27,16 +27,21 @@ if exist "DvorakTypingTrainer.spec" (
         pyinstaller --clean DvorakTypingTrainer.spec
     ) else (
         REM icon.ico가 없으면 spec 파일에서 icon 제거하고 빌드
-        pyinstaller --onefile --windowed --name="DvorakTypingTrainer" --add-data "coding_templates.json;." main.py
+        pyinstaller --onefile --windowed --name="DvorakTypingTrainer" --add-data "coding_templates.json;." --add-data "practice_texts.txt;." main.py
     )
 ) else (
     if exist "icon.ico" (
-        pyinstaller --onefile --windowed --name="DvorakTypingTrainer" --icon=icon.ico --add-data "coding_templates.json;." main.py
+        pyinstaller --onefile --windowed --name="DvorakTypingTrainer" --icon=icon.ico --add-data "coding_templates.json;." --add-data "practice_texts.txt;." main.py
     ) else (
-        pyinstaller --onefile --windowed --name="DvorakTypingTrainer" --add-data "coding_templates.json;." main.py
+        pyinstaller --onefile --windowed --name="DvorakTypingTrainer" --add-data "coding_templates.json;." --add-data "practice_texts.txt;." main.py
     )
 )
 
+REM Prebuild syntax highlight cache next to the executable
+echo Building highlight cache...
+if not exist "dist" mkdir dist
+python main.py --build-highlight-cache dist\highlight_cache.json
+
 REM Build completion message
 if exist "dist\DvorakTypingTrainer.exe" (
     echo.
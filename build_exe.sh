@@ -20,7 +20,12 @@ rm -rf dist build
 
 # PyInstaller로 exe 파일 생성
 echo "exe 파일 빌드 중..."
-pyinstaller --onefile --windowed --name="DvorakTypingTrainer" --add-data "coding_templates.json:." main.py
+pyinstaller --onefile --windowed --name="DvorakTypingTrainer" --add-data "coding_templates.json:." --add-data "practice_texts.txt:." main.py
+
+# 코딩 템플릿의 문법 하이라이트 캐시를 실행 파일 옆에 미리 생성
+echo "하이라이트 캐시 생성 중..."
+mkdir -p dist
+python main.py --build-highlight-cache dist/highlight_cache.json
 
 # 빌드 완료 메시지
 if [ -f "dist/DvorakTypingTrainer" ]; then
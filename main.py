@@ -1,4 +1,5 @@
 import tkinter as tk
+import tkinter.font as tkfont
 from tkinter import ttk, messagebox, filedialog
 import random
 import time
@@ -7,9 +8,1962 @@ import os
 import sys
 from datetime import datetime
 import re
+import hashlib
+import math
+import bisect
+import itertools
+import gzip
+import mmap
+import struct
+import threading
+import queue
+import heapq
+from array import array
+from collections import OrderedDict, deque
+import csv
+
+try:
+    import sqlite3
+except ImportError:  # sqlite3 없이 빌드된 파이썬에서는 JSON 기록만 사용
+    sqlite3 = None
+
+# 문법 하이라이팅 시 tag_add 한 번에 넘길 최대 구간 수
+SYNTAX_TAG_BATCH_SIZE = 500
+
+# 키 입력이 몰릴 때 위젯 갱신을 합칠 최소 간격 (ms, 0이면 idle 시점마다 갱신)
+FRAME_BUDGET_MS = 16
+
+# 큰 문서는 현재 줄 주변만 위젯에 올림 (가상화 렌더링)
+VIEWPORT_MIN_LINES = 300  # 이 줄 수를 넘는 문서에만 창 모드 적용
+VIEWPORT_LINES_BEFORE = 20  # 현재 줄 위로 남겨둘 완료된 줄 수
+VIEWPORT_LINES_AFTER = 80  # 현재 줄 아래로 미리 올려둘 줄 수
+
+# 입력 지연 진단: 보관할 최근 샘플 수와 히스토그램 구간 경계 (ms)
+LATENCY_SAMPLE_CAPACITY = 2000
+LATENCY_HISTOGRAM_BOUNDS = (1, 2, 4, 8, 16, 33, 66)
+
+# 세션별 키 입력 기록 파일 (통계 파일과 같은 폴더 아래)
+KEYSTROKE_LOG_DIR = "keystroke_logs"
+KEYSTROKE_LOG_VERSION = 1
+
+# 세션 재생 속도 (None 이면 즉시 재생)
+REPLAY_SPEEDS = {"1×": 1, "2×": 2, "10×": 10, "즉시": None}
+
+# 키/바이그램별 입력 간격 통계 (통계 파일과 같은 폴더)
+KEY_STATS_FILE = "key_stats.json"
+KEY_STATS_VERSION = 1
+KEY_LATENCY_MAX_MS = 2000  # 이보다 긴 간격은 쉬는 시간으로 보고 시간 통계에서 제외
+KEY_LATENCY_BUCKET_BASE_MS = 20  # 로그 눈금 히스토그램: 첫 경계와 배율
+KEY_LATENCY_BUCKET_RATIO = 1.25
+KEY_LATENCY_BUCKETS = 24
+
+# 약점 키 연습: 가중치에 반영할 약한 키/바이그램 수와 최소 시도 수
+WEAK_KEY_LIMIT = 10
+WEAK_BIGRAM_LIMIT = 20
+WEAK_KEY_MIN_COUNT = 5
+WEAK_KEY_ERROR_WEIGHT = 4  # 오타율 100%를 평균보다 4배 느린 것과 같게 취급
+WEAK_KEY_DRILL_WORDS = 40
+DRILL_LINE_WIDTH = 60
+
+# 단계별 키 연습: 홈 row 다음으로 열 글자 순서(영어 빈도순), 해제 기준, 진행 상태 파일
+ENGLISH_LETTER_FREQUENCY = "etaoinshrdlcumwfgypbvkjxqz"
+UNLOCK_MIN_ACCURACY = 95
+UNLOCK_MIN_WPM = 20
+UNLOCK_DRILL_WORDS = 30
+UNLOCK_STATE_FILE = "unlock_progress.json"
+
+# 외부 단어 목록/말뭉치: 바이너리 캐시 위치와 형식, 연습에 쓸 상위 단어 수
+CORPUS_CACHE_DIR = "corpus_cache"
+CORPUS_CACHE_MAGIC = b"DVKCORP3"
+# 매직, 종류, 원본 수정 시각(ns), 원본 크기, 원본 내용 해시(sha1), 원본 앞뒤 일부의 해시, 항목 수
+CORPUS_CACHE_HEADER = struct.Struct("<8sIqq20s20sI")
+CORPUS_CACHE_MTIME = struct.Struct("<q")
+CORPUS_CACHE_MTIME_OFFSET = struct.calcsize("<8sI")
+CORPUS_CACHE_SAMPLE_BYTES = 64 * 1024
+CORPUS_CACHE_MAX_FILES = 8  # 최근에 쓴 캐시만 남기고 나머지는 삭제
+PRACTICE_WORD_LIMIT = 50000
+CORPUS_PRACTICE_LINES = 5  # 말뭉치 연습 한 번에 보여줄 연속된 줄 수
+USER_SETTINGS_FILE = "settings.json"
+
+# 세션 기록: 통계 파일(스냅샷) 옆에 한 줄씩 추가하는 저널, 이만큼 쌓이면 스냅샷으로 합침
+SESSION_JOURNAL_SUFFIX = ".journal.jsonl"
+SESSION_JOURNAL_COMPACT_ENTRIES = 200
+# 점수판/통계 화면용 세션 색인 DB (sqlite3 가 있을 때만, JSON 기록에서 다시 만들 수 있음)
+SESSION_DB_FILE = "typing_stats.db"
+LEADERBOARD_LIMIT = 50
+# 통계 화면 누적 집계: 형식이 바뀌면 올려서 세션 목록에서 다시 계산, 최근 추세(지수 이동 평균) 반영 비율
+SESSION_AGGREGATES_VERSION = 1
+SESSION_TREND_ALPHA = 0.1
+
+# 문법 하이라이팅 구간 캐시 파일 및 설정
+HIGHLIGHT_CACHE_FILE = "highlight_cache.json"
+HIGHLIGHT_CACHE_MAX_ENTRIES = 256
+# 토크나이저 규칙이 바뀌면 올려서 이전 캐시를 무효화
+HIGHLIGHT_CACHE_VERSION = 1
+
+LANGUAGE_KEYWORDS = {
+    "python": [
+        "def",
+        "class",
+        "if",
+        "else",
+        "elif",
+        "for",
+        "while",
+        "import",
+        "from",
+        "return",
+        "try",
+        "except",
+        "finally",
+        "with",
+        "as",
+        "lambda",
+        "yield",
+        "async",
+        "await",
+        "True",
+        "False",
+        "None",
+    ],
+    "java": [
+        "public",
+        "private",
+        "protected",
+        "class",
+        "interface",
+        "extends",
+        "implements",
+        "if",
+        "else",
+        "for",
+        "while",
+        "switch",
+        "case",
+        "break",
+        "continue",
+        "return",
+        "try",
+        "catch",
+        "finally",
+        "throw",
+        "throws",
+        "static",
+        "final",
+        "abstract",
+        "synchronized",
+        "volatile",
+        "transient",
+        "native",
+        "strictfp",
+    ],
+    "javascript": [
+        "function",
+        "var",
+        "let",
+        "const",
+        "if",
+        "else",
+        "for",
+        "while",
+        "do",
+        "switch",
+        "case",
+        "break",
+        "continue",
+        "return",
+        "try",
+        "catch",
+        "finally",
+        "throw",
+        "typeof",
+        "instanceof",
+        "new",
+        "this",
+        "true",
+        "false",
+        "null",
+        "undefined",
+    ],
+    "cpp": [
+        "int",
+        "float",
+        "double",
+        "char",
+        "bool",
+        "void",
+        "if",
+        "else",
+        "for",
+        "while",
+        "do",
+        "switch",
+        "case",
+        "break",
+        "continue",
+        "return",
+        "try",
+        "catch",
+        "throw",
+        "class",
+        "struct",
+        "public",
+        "private",
+        "protected",
+        "virtual",
+        "static",
+        "const",
+        "volatile",
+        "extern",
+        "inline",
+        "template",
+        "namespace",
+        "using",
+        "new",
+        "delete",
+    ],
+    "react": [
+        "import",
+        "export",
+        "default",
+        "function",
+        "const",
+        "let",
+        "var",
+        "if",
+        "else",
+        "for",
+        "while",
+        "do",
+        "switch",
+        "case",
+        "break",
+        "continue",
+        "return",
+        "try",
+        "catch",
+        "finally",
+        "throw",
+        "typeof",
+        "instanceof",
+        "new",
+        "this",
+        "true",
+        "false",
+        "null",
+        "undefined",
+        "useState",
+        "useEffect",
+        "useContext",
+        "useReducer",
+        "useMemo",
+        "useCallback",
+        "React",
+        "Component",
+    ],
+}
+
+COMMENT_PATTERNS = {
+    "python": [r"#.*"],
+    "java": [r"//.*", r"/\*.*?\*/"],
+    "javascript": [r"//.*", r"/\*.*?\*/"],
+    "cpp": [r"//.*", r"/\*.*?\*/"],
+    "react": [r"//.*", r"/\*.*?\*/", r"\{/\*.*?\*/\}"],
+}
+
+
+def text_hash(text):
+    """같은 연습 텍스트인지 비교하기 위한 해시"""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def write_text_atomic(path, text):
+    """임시 파일에 쓴 뒤 이름을 바꿔 교체 (쓰는 도중 종료되어도 이전 파일이 온전히 남음)"""
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        file.write(text)
+    os.replace(temp_path, path)
+
+
+class PersistenceWorker:
+    """파일 저장을 맡는 단일 백그라운드 스레드 (UI 스레드는 디스크를 기다리지 않음)
+
+    key 가 같은 저장 요청이 아직 처리되지 않았으면 마지막 요청 하나로 합친다.
+    key 가 없는 요청(추가/삭제 등)은 들어온 순서대로 모두 실행한다.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.run, name="persistence", daemon=True)
+        self.thread.start()
+
+    def submit(self, write, key=None):
+        if not self.thread.is_alive():
+            # 종료 후 들어온 요청은 바로 실행
+            write()
+            return
+        with self.lock:
+            if key is not None:
+                queued = key in self.pending
+                self.pending[key] = write
+                if queued:
+                    return
+        self.queue.put((key, write))
+
+    def run(self):
+        while True:
+            key, write = self.queue.get()
+            try:
+                if write is None:
+                    return
+                if key is not None:
+                    with self.lock:
+                        write = self.pending.pop(key)
+                write()
+            except Exception as e:
+                print(f"백그라운드 저장 오류: {e}")
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        """대기 중인 저장이 모두 끝날 때까지 기다림"""
+        if self.thread.is_alive():
+            self.queue.join()
+
+    def close(self):
+        """남은 저장을 마치고 스레드 종료"""
+        if self.thread.is_alive():
+            self.queue.put((None, None))
+            self.thread.join()
+
+
+class SyntaxTokenizer:
+    """키워드/문자열/주석/숫자 구간을 언어별 통합 정규식 한 번의 스캔으로 계산"""
+
+    def __init__(self):
+        self.patterns = {}
+
+    def pattern(self, language):
+        """언어별 통합 정규식 반환 (언어당 1회 컴파일)"""
+        if language not in self.patterns:
+            keywords = sorted(LANGUAGE_KEYWORDS.get(language, []), key=len, reverse=True)
+            alternatives = []
+            comment_patterns = COMMENT_PATTERNS.get(language, [])
+            if comment_patterns:
+                alternatives.append(
+                    "(?P<comment>" + "|".join(comment_patterns) + ")"
+                )
+            alternatives.append(r"""(?P<string>"[^"\n]*"|'[^'\n]*'|`[^`\n]*`)""")
+            alternatives.append(r"(?P<number>\b\d+(?:\.\d+)?\b)")
+            if keywords:
+                alternatives.append(
+                    r"(?P<keyword>\b(?:"
+                    + "|".join(re.escape(k) for k in keywords)
+                    + r")\b)"
+                )
+            self.patterns[language] = re.compile("|".join(alternatives))
+        return self.patterns[language]
+
+    def spans(self, lines, language):
+        """줄별 (태그, 시작 열, 끝 열) 목록 반환
+
+        주석/문자열/숫자/키워드를 왼쪽부터 한 번에 스캔하므로
+        문자열 안의 주석 기호나 주석 안의 키워드는 따로 칠해지지 않는다.
+        """
+        pattern = self.pattern(language)
+        return [
+            [(m.lastgroup, m.start(), m.end()) for m in pattern.finditer(line)]
+            for line in lines
+        ]
+
+
+class HighlightCache:
+    """(언어, 텍스트 해시)별 하이라이팅 구간 LRU 캐시 (파일로 영구 저장 가능)"""
+
+    def __init__(self, path=None, max_entries=HIGHLIGHT_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.dirty = False
+        self.load()
+
+    @staticmethod
+    def make_key(language, text):
+        return f"{language}:{text_hash(text)}"
+
+    def get(self, language, text):
+        key = self.make_key(language, text)
+        line_spans = self.entries.get(key)
+        if line_spans is not None:
+            self.entries.move_to_end(key)
+        return line_spans
+
+    def put(self, language, text, line_spans):
+        self.entries[self.make_key(language, text)] = line_spans
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.dirty = True
+
+    def load(self):
+        """캐시 파일 로드 (없거나 버전이 다르면 빈 캐시로 시작)"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            if data.get("version") != HIGHLIGHT_CACHE_VERSION:
+                return
+            for key, line_spans in data.get("entries", {}).items():
+                self.entries[key] = [
+                    [tuple(span) for span in spans] for spans in line_spans
+                ]
+        except Exception:
+            self.entries.clear()
+
+    def dumps(self):
+        """저장할 내용 (변경이 없으면 None)"""
+        if not self.path or not self.dirty:
+            return None
+        self.dirty = False
+        return json.dumps(
+            {"version": HIGHLIGHT_CACHE_VERSION, "entries": self.entries},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+
+    def save(self):
+        """변경된 경우에만 캐시 파일 저장"""
+        text = self.dumps()
+        if text is None:
+            return
+        try:
+            write_text_atomic(self.path, text)
+        except Exception as e:
+            print(f"하이라이트 캐시 저장 오류: {e}")
+
+
+def build_highlight_cache(templates_path, output_path):
+    """coding_templates.json 의 모든 템플릿에 대한 하이라이트 캐시를 미리 생성"""
+    with open(templates_path, "r", encoding="utf-8") as file:
+        templates = json.load(file)
+
+    tokenizer = SyntaxTokenizer()
+    total = sum(len(items) + 1 for levels in templates.values() for items in levels.values())
+    # 기존 파일을 읽지 않고 새로 만든 뒤 output_path 에 저장
+    cache = HighlightCache(None, max(HIGHLIGHT_CACHE_MAX_ENTRIES, total))
+    cache.path = output_path
+    for language, levels in templates.items():
+        for difficulty, items in levels.items():
+            texts = list(items)
+            # 기본 난이도는 앞의 두 예문을 이어 붙여 표시하므로 그 조합도 포함
+            if difficulty == "basic" and items:
+                texts.append("\n\n".join(items[:2]))
+            for text in texts:
+                cache.put(language, text, tokenizer.spans(text.split("\n"), language))
+    cache.save()
+    return len(cache.entries)
+
+
+
+def percentile(sorted_values, fraction):
+    """정렬된 값의 백분위수 (최근접 순위)"""
+    if not sorted_values:
+        return 0.0
+    index = int(round(fraction * len(sorted_values))) - 1
+    return sorted_values[min(len(sorted_values) - 1, max(0, index))]
+
+
+class LatencyRecorder:
+    """키 입력부터 화면 반영까지의 지연 샘플을 최근 N개만 보관"""
+
+    # 전체 지연, 프레임 대기, 문법 하이라이팅, 입력 줄, 통계, 진행률 (ms)
+    FIELDS = ("total_ms", "wait_ms", "syntax_ms", "lines_ms", "stats_ms", "progress_ms")
+
+    def __init__(self, capacity=LATENCY_SAMPLE_CAPACITY):
+        self.samples = deque(maxlen=capacity)
+        self.recorded = 0
+        self.started = time.perf_counter()
+
+    def record_frame(self, arrivals, flush_started, flush_ended, sections):
+        """한 프레임에 반영된 키 입력마다 샘플 추가 (구간 시간은 프레임 단위로 공유)"""
+        for arrived in arrivals:
+            self.samples.append(
+                (
+                    arrived - self.started,
+                    (flush_ended - arrived) * 1000,
+                    (flush_started - arrived) * 1000,
+                )
+                + sections
+            )
+        self.recorded += len(arrivals)
+
+    def values(self, field):
+        index = self.FIELDS.index(field) + 1
+        return sorted(sample[index] for sample in self.samples)
+
+    def percentiles(self, field="total_ms"):
+        """(p50, p95, p99)"""
+        values = self.values(field)
+        return tuple(percentile(values, p) for p in (0.50, 0.95, 0.99))
+
+    def histogram(self, bounds=LATENCY_HISTOGRAM_BOUNDS):
+        """전체 지연 분포 - 마지막 칸은 가장 큰 경계 이상"""
+        counts = [0] * (len(bounds) + 1)
+        for sample in self.samples:
+            counts[bisect.bisect_right(bounds, sample[1])] += 1
+        return counts
+
+    def dump(self, path):
+        """보관 중인 샘플을 CSV로 저장"""
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(("time_s",) + self.FIELDS)
+            for sample in self.samples:
+                writer.writerow([f"{value:.4f}" for value in sample])
+
+
+class CorrectnessRuns:
+    """한 줄의 정오 상태를 연속 구간(run) 단위로 관리"""
+
+    __slots__ = ("runs", "length")
+
+    def __init__(self):
+        # [정답 여부, 시작 열, 끝 열] 목록 - 같은 상태가 이어지면 하나의 구간으로 병합
+        self.runs = []
+        self.length = 0
+
+    def truncate(self, length):
+        """length 열 이후의 정오 정보 제거"""
+        while self.runs and self.runs[-1][1] >= length:
+            self.runs.pop()
+        if self.runs and self.runs[-1][2] > length:
+            self.runs[-1][2] = length
+        self.length = min(self.length, length)
+
+    def append(self, is_correct):
+        """한 글자의 정오 추가 (직전 구간과 상태가 같으면 구간을 늘림)"""
+        if self.runs and self.runs[-1][0] == is_correct:
+            self.runs[-1][2] += 1
+        else:
+            self.runs.append([is_correct, self.length, self.length + 1])
+        self.length += 1
+
+    def ranges_from(self, start):
+        """start 열 이후의 구간을 (태그, 시작 열, 끝 열) 목록으로 반환"""
+        result = []
+        for is_correct, run_start, run_end in reversed(self.runs):
+            if run_end <= start:
+                break
+            tag = "correct" if is_correct else "incorrect"
+            result.append((tag, max(run_start, start), run_end))
+        result.reverse()
+        return result
+
+
+class KeystrokeLog:
+    """세션의 키 입력 기록 - 필드별 array 에 키당 19바이트로 보관
+
+    시각(세션 첫 키 기준 ms), 기대 문자와 입력 문자(코드 포인트, 없으면 0),
+    줄, 열, 플래그(정타/백스페이스/Enter)를 기록한다.
+    """
+
+    __slots__ = ("times", "expected", "typed", "lines", "columns", "flags")
+
+    FLAG_CORRECT = 1
+    FLAG_BACKSPACE = 2
+    FLAG_ENTER = 4
+    # 저장 순서와 array 형식
+    FIELDS = (
+        ("times", "I"),
+        ("expected", "I"),
+        ("typed", "I"),
+        ("lines", "I"),
+        ("columns", "H"),
+        ("flags", "B"),
+    )
+
+    def __init__(self):
+        for name, typecode in self.FIELDS:
+            setattr(self, name, array(typecode))
+
+    def __len__(self):
+        return len(self.times)
+
+    def append(self, time_ms, expected, typed, line, column, flags):
+        self.times.append(time_ms)
+        self.expected.append(expected)
+        self.typed.append(typed)
+        self.lines.append(line)
+        self.columns.append(min(column, 0xFFFF))
+        self.flags.append(flags)
+
+    def save(self, path, header):
+        """gzip 파일로 저장: JSON 헤더 한 줄 + 필드별 원시 바이트"""
+        header = dict(header)
+        header.update(
+            version=KEYSTROKE_LOG_VERSION, count=len(self), byteorder=sys.byteorder
+        )
+        with gzip.open(path, "wb") as file:
+            file.write(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n")
+            for name, _ in self.FIELDS:
+                file.write(getattr(self, name).tobytes())
+
+    @classmethod
+    def load(cls, path):
+        """(헤더, 기록) 반환 - 형식이 맞지 않으면 ValueError"""
+        with gzip.open(path, "rb") as file:
+            header = json.loads(file.readline().decode("utf-8"))
+            if header.get("version") != KEYSTROKE_LOG_VERSION:
+                raise ValueError(f"지원하지 않는 키 입력 기록 형식: {path}")
+            log = cls()
+            count = header["count"]
+            for name, typecode in cls.FIELDS:
+                values = getattr(log, name)
+                data = file.read(count * values.itemsize)
+                if len(data) != count * values.itemsize:
+                    raise ValueError(f"키 입력 기록이 손상되었습니다: {path}")
+                values.frombytes(data)
+                if header.get("byteorder") != sys.byteorder:
+                    values.byteswap()
+        return header, log
+
+
+class KeyLatencyStats:
+    """키/바이그램별 시도 수, 오타 수, 입력 간격 합계와 히스토그램을 누적
+
+    항목 형식: [시도 수, 오타 수, 시간 측정 수, 간격 합계(ms), 히스토그램]
+    세션이 끝날 때마다 그 세션의 키 입력 기록만 더하므로 과거 기록을 다시 읽지 않는다.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.keys = {}
+        self.bigrams = {}
+        self.dirty = False
+        # 내용이 바뀔 때마다 증가 (파생 캐시 무효화용)
+        self.revision = 0
+        self.load()
+
+    @staticmethod
+    def bucket(latency_ms):
+        if latency_ms < KEY_LATENCY_BUCKET_BASE_MS:
+            return 0
+        index = int(
+            math.log(latency_ms / KEY_LATENCY_BUCKET_BASE_MS)
+            / math.log(KEY_LATENCY_BUCKET_RATIO)
+        ) + 1
+        return min(index, KEY_LATENCY_BUCKETS - 1)
+
+    @staticmethod
+    def bucket_middle(index):
+        """히스토그램 칸의 대표값 (기하 평균)"""
+        if index == 0:
+            return KEY_LATENCY_BUCKET_BASE_MS / 2
+        lower = KEY_LATENCY_BUCKET_BASE_MS * KEY_LATENCY_BUCKET_RATIO ** (index - 1)
+        return lower * math.sqrt(KEY_LATENCY_BUCKET_RATIO)
+
+    @staticmethod
+    def new_entry():
+        return [0, 0, 0, 0, [0] * KEY_LATENCY_BUCKETS]
+
+    def add(self, table, key, is_error, latency_ms):
+        entry = table.get(key)
+        if entry is None:
+            entry = table[key] = self.new_entry()
+        entry[0] += 1
+        if is_error:
+            entry[1] += 1
+        if latency_ms is not None:
+            entry[2] += 1
+            entry[3] += latency_ms
+            entry[4][self.bucket(latency_ms)] += 1
+
+    def merge_log(self, log):
+        """한 세션의 키 입력 기록을 누적
+
+        바이그램의 앞 글자는 같은 줄 바로 앞 열의 원문 글자이므로 백스페이스 후
+        다시 입력한 글자도 올바른 바이그램으로 센다. 백스페이스/Enter 직후의
+        입력 간격은 수정 동작이 섞이므로 시간 통계에서 뺀다.
+        """
+        line_chars = {}
+        current_line = None
+        previous_time = None
+        for i in range(len(log)):
+            flags = log.flags[i]
+            time_ms = log.times[i]
+            if flags & (KeystrokeLog.FLAG_BACKSPACE | KeystrokeLog.FLAG_ENTER):
+                previous_time = None
+                continue
+            char = chr(log.expected[i])
+            column = log.columns[i]
+            if log.lines[i] != current_line:
+                current_line = log.lines[i]
+                line_chars = {}
+            is_error = not flags & KeystrokeLog.FLAG_CORRECT
+            latency_ms = None
+            if previous_time is not None and time_ms - previous_time <= KEY_LATENCY_MAX_MS:
+                latency_ms = time_ms - previous_time
+            self.add(self.keys, char, is_error, latency_ms)
+            previous_char = line_chars.get(column - 1)
+            if previous_char is not None:
+                self.add(self.bigrams, previous_char + char, is_error, latency_ms)
+            line_chars[column] = char
+            previous_time = time_ms
+        self.dirty = True
+        self.revision += 1
+
+    def median(self, entry):
+        """히스토그램으로 추정한 중앙값 (ms)"""
+        half = entry[2] / 2
+        seen = 0
+        for index, count in enumerate(entry[4]):
+            seen += count
+            if count and seen >= half:
+                return self.bucket_middle(index)
+        return 0.0
+
+    def rows(self, table, min_count=1):
+        """(키, 시도 수, 평균 ms, 중앙값 ms, 오타율 %) 목록"""
+        rows = []
+        for key, entry in table.items():
+            if entry[0] < min_count:
+                continue
+            mean = entry[3] / entry[2] if entry[2] else 0.0
+            rows.append(
+                (key, entry[0], mean, self.median(entry), entry[1] / entry[0] * 100)
+            )
+        return rows
+
+    def slowest(self, table, limit=15, min_count=5):
+        """평균 입력 간격이 긴 순서"""
+        rows = [row for row in self.rows(table, min_count) if row[2] > 0]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows[:limit]
+
+    def weak_features(
+        self,
+        key_limit=WEAK_KEY_LIMIT,
+        bigram_limit=WEAK_BIGRAM_LIMIT,
+        min_count=WEAK_KEY_MIN_COUNT,
+    ):
+        """약한 키/바이그램별 가중치 {소문자 글자: 점수}
+
+        점수 = 오타율 * WEAK_KEY_ERROR_WEIGHT + (평균 간격 / 전체 평균 간격 - 1)
+        단어 색인은 소문자 글자로 만들어지므로 대소문자는 합치고(큰 점수), 문장부호/공백이 든 키는 뺀다.
+        """
+        timed = sum(entry[2] for entry in self.keys.values())
+        overall_mean = sum(entry[3] for entry in self.keys.values()) / timed if timed else 0
+        features = {}
+        for table, limit in ((self.keys, key_limit), (self.bigrams, bigram_limit)):
+            scores = {}
+            for key, count, mean, _, error_rate in self.rows(table, min_count):
+                key = key.lower()
+                if not key.isalpha():
+                    continue
+                score = error_rate / 100 * WEAK_KEY_ERROR_WEIGHT
+                if overall_mean and mean:
+                    score += max(0.0, mean / overall_mean - 1)
+                if score > scores.get(key, 0):
+                    scores[key] = score
+            scored = sorted(((score, key) for key, score in scores.items()), reverse=True)
+            features.update((key, score) for score, key in scored[:limit])
+        return features
+
+    def clear(self):
+        self.keys = {}
+        self.bigrams = {}
+        self.dirty = True
+        self.revision += 1
+
+    def load(self):
+        """통계 파일 로드 (없거나 버전이 다르면 빈 통계로 시작)"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            if data.get("version") != KEY_STATS_VERSION:
+                return
+            self.keys = data.get("keys", {})
+            self.bigrams = data.get("bigrams", {})
+            self.revision += 1
+        except Exception:
+            self.keys = {}
+            self.bigrams = {}
+
+    def dumps(self):
+        """저장할 내용 (변경이 없으면 None)"""
+        if not self.path or not self.dirty:
+            return None
+        self.dirty = False
+        return json.dumps(
+            {
+                "version": KEY_STATS_VERSION,
+                "keys": self.keys,
+                "bigrams": self.bigrams,
+            },
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+
+    def save(self):
+        """변경된 경우에만 통계 파일 저장"""
+        text = self.dumps()
+        if text is None:
+            return
+        try:
+            write_text_atomic(self.path, text)
+        except Exception as e:
+            print(f"키 통계 저장 오류: {e}")
+
+
+class SessionJournal:
+    """세션 기록 저장소: JSON 스냅샷 + 추가 전용 JSON Lines 저널
+
+    세션 하나를 저장할 때는 저널에 한 줄만 추가하고, 로드할 때는 스냅샷 뒤에 저널을 이어 붙인다.
+    저널 항목에는 일련번호가 있어, 스냅샷 교체 직후 저널을 비우기 전에 종료되어도 중복 적용되지 않는다.
+    append/compact 는 메모리에만 쌓고, 실제 파일 쓰기는 write() 에서 (저장 스레드에서 호출 가능)
+    """
+
+    def __init__(self, snapshot_path):
+        self.snapshot_path = snapshot_path
+        self.journal_path = os.path.splitext(snapshot_path)[0] + SESSION_JOURNAL_SUFFIX
+        # 마지막으로 적용한 항목 번호와 스냅샷 이후 쌓인 항목 수
+        self.seq = 0
+        self.pending = 0
+        # 아직 파일에 쓰지 않은 (번호, 줄) 목록과 스냅샷
+        self.lock = threading.Lock()
+        self.unwritten = []
+        self.snapshot = None
+
+    def load(self):
+        """스냅샷과 저널을 읽어 {"sessions": [...], "user_name": ...} 형태로 반환"""
+        data = {"sessions": []}
+        self.seq = 0
+        self.pending = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as file:
+                snapshot = json.load(file)
+            # 이전 형식 호환성 (세션 목록만 저장된 파일)
+            if isinstance(snapshot, list):
+                data["sessions"] = snapshot
+            elif isinstance(snapshot, dict):
+                data["sessions"] = snapshot.get("sessions", [])
+                if "user_name" in snapshot:
+                    data["user_name"] = snapshot["user_name"]
+                if "aggregates" in snapshot:
+                    data["aggregates"] = snapshot["aggregates"]
+                self.seq = snapshot.get("journal_seq", 0)
+        for entry in self.read_journal():
+            if entry.get("seq", 0) <= self.seq:
+                continue
+            self.seq = entry["seq"]
+            self.pending += 1
+            if "session" in entry:
+                data["sessions"].append(entry["session"])
+            if "user_name" in entry:
+                data["user_name"] = entry["user_name"]
+        return data
+
+    def read_journal(self):
+        """저널 항목 목록 (쓰다가 끊긴 마지막 줄은 잘라내고, 깨진 줄은 건너뜀)"""
+        if not os.path.exists(self.journal_path):
+            return []
+        with open(self.journal_path, "rb") as file:
+            raw = file.read()
+        end = raw.rfind(b"\n") + 1
+        if end < len(raw):
+            # 다음 추가가 끊긴 줄 뒤에 붙지 않도록 마지막 완전한 줄까지만 남김
+            with open(self.journal_path, "r+b") as file:
+                file.truncate(end)
+        entries = []
+        for line in raw[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict):
+                entries.append(entry)
+        return entries
+
+    def append(self, entry):
+        """저널에 항목 한 줄 추가 (entry: {"session": {...}} 또는 {"user_name": ...})"""
+        with self.lock:
+            self.seq += 1
+            line = json.dumps(
+                dict(entry, seq=self.seq), ensure_ascii=False, separators=(",", ":")
+            )
+            self.unwritten.append((self.seq, line))
+        self.pending += 1
+
+    def needs_compaction(self):
+        return self.pending >= SESSION_JOURNAL_COMPACT_ENTRIES
+
+    def compact(self, data):
+        """전체 기록을 스냅샷으로 예약 (data 는 이후 바뀌지 않는 사본이어야 함)"""
+        with self.lock:
+            self.snapshot = dict(data, journal_seq=self.seq)
+        self.pending = 0
+
+    def write(self):
+        """쌓인 줄을 저널에 추가하고, 스냅샷이 예약돼 있으면 스냅샷 교체 후 저널을 그 이후 줄만 남김"""
+        with self.lock:
+            lines, self.unwritten = self.unwritten, []
+            snapshot, self.snapshot = self.snapshot, None
+        try:
+            if snapshot is None:
+                with open(self.journal_path, "a", encoding="utf-8") as file:
+                    file.writelines(line + "\n" for _, line in lines)
+                return
+            write_text_atomic(
+                self.snapshot_path,
+                json.dumps(snapshot, ensure_ascii=False, separators=(",", ":")),
+            )
+            # 저널도 임시 파일로 교체 (도중에 종료되어도 이전 저널이 남고, 중복 줄은 번호로 걸러짐)
+            write_text_atomic(
+                self.journal_path,
+                "".join(
+                    line + "\n" for seq, line in lines if seq > snapshot["journal_seq"]
+                ),
+            )
+        except Exception:
+            # 다음 write() 에서 다시 시도하도록 되돌려 둠
+            with self.lock:
+                self.unwritten[:0] = lines
+                if self.snapshot is None:
+                    self.snapshot = snapshot
+            raise
+
+
+class StatsRepository:
+    """세션 기록과 사용자 이름을 함께 제공하는 저장소 (파일은 처음 필요할 때 한 번만 읽음)"""
+
+    def __init__(self, path, default_user_name="Player"):
+        self.journal = SessionJournal(path)
+        self.default_user_name = default_user_name
+        self.data = None
+        self.aggregates = SessionAggregates()
+
+    @property
+    def loaded(self):
+        return self.data is not None
+
+    def load(self):
+        """스냅샷 + 저널 읽기 (이미 읽었으면 그대로)"""
+        if self.data is not None:
+            return self.data
+        try:
+            self.data = self.journal.load()
+        except Exception as e:
+            print(f"통계 로드 오류: {e}")
+            self.data = {"sessions": []}
+        # 스냅샷의 집계에 저널로 이어 붙은 세션만 더함 (없거나 맞지 않으면 한 번 다시 계산)
+        sessions = self.data["sessions"]
+        aggregates = SessionAggregates.from_dict(self.data.pop("aggregates", None))
+        if aggregates is None or aggregates.count > len(sessions):
+            aggregates = SessionAggregates()
+        for session in sessions[aggregates.count:]:
+            aggregates.add(session)
+        self.aggregates = aggregates
+        return self.data
+
+    @property
+    def sessions(self):
+        return self.load()["sessions"]
+
+    @property
+    def user_name(self):
+        return self.load().get("user_name", self.default_user_name)
+
+    @user_name.setter
+    def user_name(self, name):
+        self.load()["user_name"] = name
+
+    def add_session(self, session):
+        self.sessions.append(session)
+        self.aggregates.add(session)
+
+    def clear(self):
+        """세션 기록만 비움 (사용자 이름은 유지)"""
+        self.load()["sessions"] = []
+        self.aggregates = SessionAggregates()
+
+
+class SessionAggregates:
+    """세션 기록의 누적 집계 (전체/모드별/(언어, 난이도)별) - 세션이 추가될 때마다 갱신
+
+    항목 형식: [횟수, 점수 있는 횟수, WPM 합, WPM 제곱합, 정확도 합, 정확도 제곱합,
+               점수 합, 점수 제곱합, 최고 점수, 최근 WPM(지수 이동 평균)]
+    통계 화면은 세션 목록을 훑지 않고 이 값들로 평균/표준편차/추세를 계산한다.
+    """
+
+    def __init__(self):
+        self.overall = self.new_entry()
+        self.modes = {}
+        # 코딩 연습: 언어 -> 난이도 -> 항목
+        self.coding = {}
+
+    @staticmethod
+    def new_entry():
+        return [0, 0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, None]
+
+    @staticmethod
+    def add_to(entry, session):
+        wpm = session["wpm"]
+        accuracy = session["accuracy"]
+        score = session.get("score", 0)
+        entry[0] += 1
+        if "score" in session:
+            entry[1] += 1
+        entry[2] += wpm
+        entry[3] += wpm * wpm
+        entry[4] += accuracy
+        entry[5] += accuracy * accuracy
+        entry[6] += score
+        entry[7] += score * score
+        entry[8] = max(entry[8], score)
+        recent = entry[9]
+        entry[9] = wpm if recent is None else recent + SESSION_TREND_ALPHA * (wpm - recent)
+
+    def add(self, session):
+        self.add_to(self.overall, session)
+        mode = session.get("mode")
+        self.add_to(self.modes.setdefault(str(mode), self.new_entry()), session)
+        if mode == "coding":
+            by_difficulty = self.coding.setdefault(str(session.get("language")), {})
+            self.add_to(
+                by_difficulty.setdefault(str(session.get("difficulty")), self.new_entry()),
+                session,
+            )
+
+    @property
+    def count(self):
+        return self.overall[0]
+
+    @classmethod
+    def from_sessions(cls, sessions):
+        aggregates = cls()
+        for session in sessions:
+            aggregates.add(session)
+        return aggregates
+
+    @staticmethod
+    def merge(entries):
+        """여러 항목을 합친 항목 (최근 추세는 합칠 수 없어 None)"""
+        merged = SessionAggregates.new_entry()
+        for entry in entries:
+            for i in range(8):
+                merged[i] += entry[i]
+            merged[8] = max(merged[8], entry[8])
+        return merged
+
+    @staticmethod
+    def describe(entry):
+        """항목의 평균/표준편차 (평균 점수는 모든 세션에 점수가 있을 때만 - 이전 기록 호환)"""
+        count = entry[0]
+        if count == 0:
+            return None
+
+        def mean_std(total, squares):
+            mean = total / count
+            return mean, math.sqrt(max(0.0, squares / count - mean * mean))
+
+        wpm, wpm_std = mean_std(entry[2], entry[3])
+        accuracy, accuracy_std = mean_std(entry[4], entry[5])
+        score, score_std = mean_std(entry[6], entry[7])
+        if entry[1] != count:
+            score = score_std = 0
+        return {
+            "count": count,
+            "wpm": wpm,
+            "wpm_std": wpm_std,
+            "accuracy": accuracy,
+            "accuracy_std": accuracy_std,
+            "score": score,
+            "score_std": score_std,
+            "max_score": entry[8],
+            "recent_wpm": entry[9],
+        }
+
+    def summary(self):
+        """통계 화면용: 전체, 모드별, 코딩 언어별(난이도 합산), 언어/난이도별 describe 결과"""
+        return {
+            "all": self.describe(self.overall),
+            "modes": {mode: self.describe(entry) for mode, entry in self.modes.items()},
+            "languages": {
+                language: self.describe(self.merge(by_difficulty.values()))
+                for language, by_difficulty in self.coding.items()
+            },
+            "difficulties": {
+                language: {
+                    difficulty: self.describe(entry)
+                    for difficulty, entry in by_difficulty.items()
+                }
+                for language, by_difficulty in self.coding.items()
+            },
+        }
+
+    def to_dict(self):
+        """스냅샷 저장용 사본 (저장 스레드가 쓰는 동안 바뀌지 않도록 목록을 복사)"""
+        return {
+            "version": SESSION_AGGREGATES_VERSION,
+            "overall": list(self.overall),
+            "modes": {mode: list(entry) for mode, entry in self.modes.items()},
+            "coding": {
+                language: {difficulty: list(entry) for difficulty, entry in by_difficulty.items()}
+                for language, by_difficulty in self.coding.items()
+            },
+        }
+
+    @staticmethod
+    def valid_entry(entry):
+        return (
+            isinstance(entry, list)
+            and len(entry) == 10
+            and isinstance(entry[0], int)
+            and isinstance(entry[1], int)
+            and 0 <= entry[1] <= entry[0]
+            and all(isinstance(value, (int, float)) for value in entry[2:9])
+            and (entry[9] is None or isinstance(entry[9], (int, float)))
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        """저장된 집계 (형식이 다르거나 깨졌으면 None - 세션 목록에서 다시 계산)"""
+        if not isinstance(data, dict) or data.get("version") != SESSION_AGGREGATES_VERSION:
+            return None
+        try:
+            overall = data["overall"]
+            modes = data.get("modes", {})
+            coding = data.get("coding", {})
+            entries = [overall, *modes.values()]
+            for by_difficulty in coding.values():
+                entries.extend(by_difficulty.values())
+        except (KeyError, AttributeError, TypeError):
+            return None
+        if not all(cls.valid_entry(entry) for entry in entries):
+            return None
+        # 모든 세션은 모드 하나에 더해지므로 모드별 횟수의 합은 전체 횟수와 같아야 함
+        if sum(entry[0] for entry in modes.values()) != overall[0]:
+            return None
+        aggregates = cls()
+        aggregates.overall = overall
+        aggregates.modes = modes
+        aggregates.coding = coding
+        return aggregates
+
+
+class SessionStore:
+    """세션 기록의 sqlite 색인 (점수판 정렬/최근 기록/고스트 조회를 인덱스 질의로 처리)
+
+    원본은 JSON 기록이고, 이 DB는 시작할 때 JSON 기록과 맞춰 두는 사본이다.
+    """
+
+    SORT_COLUMNS = ("score", "wpm", "accuracy", "date")
+    COLUMNS = (
+        "date", "name", "wpm", "accuracy", "time", "score",
+        "mode", "language", "difficulty", "text_hash", "keystroke_log",
+    )
+    # 이름: 열 목록 (정렬 기준별 인덱스는 같은 값이면 먼저 저장된 기록이 위 - 기존 안정 정렬과 같음)
+    INDEXES = {
+        "sessions_score": "score DESC, id",
+        "sessions_wpm": "wpm DESC, id",
+        "sessions_accuracy": "accuracy DESC, id",
+        "sessions_date": "date DESC, id",
+        "sessions_name": "name",
+        "sessions_mode": "mode",
+        "sessions_language": "language",
+        "sessions_difficulty": "difficulty",
+        "sessions_text_hash": "text_hash, score DESC",
+    }
+
+    def __init__(self, path):
+        # 쓰기 연결은 저장 스레드(시작 시 맞추기만 UI 스레드, 고스트 조회도 저장 스레드),
+        # 조회 연결은 UI 스레드 전용
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        # WAL: 저장 스레드가 쓰는 동안에도 조회가 기다리지 않음
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                id INTEGER PRIMARY KEY,
+                date TEXT, name TEXT, wpm REAL, accuracy REAL, time REAL,
+                score REAL, mode TEXT, language TEXT, difficulty TEXT,
+                text_hash TEXT, keystroke_log TEXT,
+                data TEXT NOT NULL
+            )
+            """
+        )
+        self.create_indexes()
+        self.connection.commit()
+        self.reader = sqlite3.connect(path, isolation_level=None)
+
+    def create_indexes(self):
+        for name, columns in self.INDEXES.items():
+            self.connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {name} ON sessions ({columns})"
+            )
+
+    def drop_indexes(self):
+        for name in self.INDEXES:
+            self.connection.execute(f"DROP INDEX IF EXISTS {name}")
+
+    @staticmethod
+    def encode(session):
+        return json.dumps(session, ensure_ascii=False, separators=(",", ":"))
+
+    def row(self, session):
+        return tuple(session.get(column) for column in self.COLUMNS) + (
+            self.encode(session),
+        )
+
+    def insert_many(self, sessions):
+        self.connection.executemany(
+            f"INSERT INTO sessions ({', '.join(self.COLUMNS)}, data) "
+            f"VALUES ({', '.join('?' * (len(self.COLUMNS) + 1))})",
+            (self.row(session) for session in sessions),
+        )
+
+    def sync(self, sessions):
+        """JSON 기록과 맞춤: 앞부분이 같으면 뒤에 추가된 세션만, 다르면 전체를 다시 가져옴
+
+        행 id 는 항상 JSON 기록에서의 순번(1부터)과 같다.
+        """
+        with self.connection:
+            count = self.connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            if count:
+                last = self.connection.execute(
+                    "SELECT data FROM sessions ORDER BY id DESC LIMIT 1"
+                ).fetchone()[0]
+                if count > len(sessions) or last != self.encode(sessions[count - 1]):
+                    self.connection.execute("DELETE FROM sessions")
+                    count = 0
+            if count == 0 and sessions:
+                # 전체 가져오기는 인덱스를 나중에 한 번에 만드는 편이 훨씬 빠름
+                self.drop_indexes()
+                self.insert_many(sessions)
+                self.create_indexes()
+            else:
+                self.insert_many(sessions[count:])
+
+    def add(self, session):
+        with self.connection:
+            self.insert_many([session])
+
+    def clear(self):
+        with self.connection:
+            self.connection.execute("DELETE FROM sessions")
+
+    def read(self, sessions, sql, params=(), connection=None):
+        """조회 결과와 아직 DB에 쓰이지 않은 뒤쪽 세션 목록 (DB가 sessions 의 앞부분이 아니면 None)
+
+        쓰기를 기다리지 않고, 저장 스레드가 아직 넣지 않은 세션은 메모리 목록에서 채운다.
+        connection 을 주지 않으면 UI 스레드 전용 조회 연결을 쓴다.
+        """
+        connection = connection or self.reader
+        try:
+            connection.execute("BEGIN")
+            try:
+                rows = connection.execute(sql, params).fetchall()
+                last = connection.execute(
+                    "SELECT id, data FROM sessions ORDER BY id DESC LIMIT 1"
+                ).fetchone()
+            finally:
+                connection.execute("COMMIT")
+        except sqlite3.Error as e:
+            print(f"세션 DB 조회 오류: {e}")
+            return None
+        written = last[0] if last else 0
+        # 초기화처럼 아직 반영되지 않은 변경이 있으면 DB 내용을 쓸 수 없음
+        if written > len(sessions) or (
+            last and last[1] != self.encode(sessions[written - 1])
+        ):
+            return None
+        return rows, sessions[written:], written
+
+    def top(self, sort_key, sessions, limit=LEADERBOARD_LIMIT):
+        """정렬 기준 상위 세션 (인덱스 순서대로 limit 개만 읽고 미반영 세션과 합침)"""
+        if sort_key not in self.SORT_COLUMNS:
+            raise ValueError(f"알 수 없는 정렬 기준: {sort_key}")
+        result = self.read(
+            sessions,
+            f"SELECT {sort_key}, id, data FROM sessions ORDER BY {sort_key} DESC, id LIMIT ?",
+            (limit,),
+        )
+        if result is None:
+            return None
+        rows, pending, written = result
+        items = [(value, row_id, json.loads(data)) for value, row_id, data in rows]
+        items.extend(
+            (session.get(sort_key), written + 1 + i, session)
+            for i, session in enumerate(pending)
+        )
+        # SQL 과 같은 순서: 값 내림차순(NULL 은 맨 뒤), 같으면 먼저 저장된 기록
+        items.sort(key=lambda item: item[1])
+        items.sort(key=lambda item: (item[0] is not None, item[0]), reverse=True)
+        return [session for _, _, session in items[:limit]]
+
+    def best_run(self, digest, sessions, connection=None):
+        """같은 텍스트에서 점수가 가장 높은, 키 입력 기록이 있는 세션 (없으면 None, DB로 답할 수 없으면 False)"""
+        result = self.read(
+            sessions,
+            "SELECT score, data FROM sessions WHERE text_hash = ? AND keystroke_log IS NOT NULL "
+            "AND keystroke_log != '' ORDER BY score DESC, id LIMIT 1",
+            (digest,),
+            connection,
+        )
+        if result is None:
+            return False
+        rows, pending, _ = result
+        best_score, best = (rows[0][0], json.loads(rows[0][1])) if rows else (None, None)
+        for session in pending:
+            if session.get("text_hash") != digest or not session.get("keystroke_log"):
+                continue
+            score = session.get("score", 0)
+            if best is None or score > best_score:
+                best_score, best = score, session
+        return best
+
+    def close(self):
+        self.reader.close()
+        self.connection.close()
+
+
+class WeightedWordSampler:
+    """약한 키/바이그램이 많이 든 단어일수록 자주 뽑는 단어 샘플러
+
+    단어별 특징(글자, 바이그램)을 한 번 계산해 특징 → 단어 번호 역색인으로 두고,
+    가중치가 바뀔 때만 누적 가중치를 다시 만든다. 추출은 누적 가중치 이진 탐색.
+    """
+
+    # 중복 없는 추출에서 겹친 단어를 다시 뽑는 최대 횟수 (넘으면 전체 단어에서 가중 추출)
+    REDRAW_ROUNDS = 8
+
+    def __init__(self, words):
+        self.words = list(words)
+        self.index = {}
+        for word_index, word in enumerate(self.words):
+            lowered = word.lower()
+            features = set(lowered)
+            features.update(lowered[i : i + 2] for i in range(len(lowered) - 1))
+            for feature in features:
+                postings = self.index.get(feature)
+                if postings is None:
+                    postings = self.index[feature] = array("I")
+                postings.append(word_index)
+        self.weights = None
+        self.cum_weights = None
+        self.set_weights({})
+
+    def set_weights(self, feature_weights):
+        """특징별 가중치 적용 - 단어 가중치 = 1 + 포함된 약한 특징 점수 합"""
+        weights = [1.0] * len(self.words)
+        for feature, weight in feature_weights.items():
+            for word_index in self.index.get(feature, ()):
+                weights[word_index] += weight
+        self.weights = weights
+        self.cum_weights = list(itertools.accumulate(weights))
+
+    def sample(self, count, rng=random):
+        if not self.words:
+            return []
+        return rng.choices(self.words, cum_weights=self.cum_weights, k=count)
+
+    def sample_unique(self, count, rng=random):
+        """서로 다른 단어 count 개를 가중치 비율로 추출 (비복원)"""
+        chosen = {}
+        for _ in range(self.REDRAW_ROUNDS):
+            missing = count - len(chosen)
+            if missing <= 0 or not self.words:
+                return list(chosen)
+            for word in rng.choices(self.words, cum_weights=self.cum_weights, k=missing):
+                chosen.setdefault(word, None)
+        # 가중치가 몇 단어에 몰려 계속 겹치면 키 random() ** (1 / w) 상위 단어로 채움
+        keys = {}
+        for word, weight in zip(self.words, self.weights):
+            if word not in chosen:
+                key = rng.random() ** (1.0 / weight)
+                if key > keys.get(word, -1.0):
+                    keys[word] = key
+        chosen.update(dict.fromkeys(heapq.nlargest(count - len(chosen), keys, key=keys.get)))
+        return list(chosen)
+
+
+def letter_mask(word):
+    """단어에 쓰인 영문 소문자를 비트로 표시 (영문자 외 글자가 있으면 None)"""
+    mask = 0
+    for char in word:
+        if not "a" <= char <= "z":
+            return None
+        mask |= 1 << (ord(char) - 97)
+    return mask
+
+
+class LetterMaskIndex:
+    """단어를 쓰인 글자 비트마스크별로 묶은 색인
+
+    "해제된 글자만으로 칠 수 있는 단어"는 서로 다른 마스크 수만큼만 검사하면 된다.
+    """
+
+    def __init__(self, words):
+        self.groups = {}
+        for word in words:
+            mask = letter_mask(word.lower())
+            if mask:
+                self.groups.setdefault(mask, []).append(word)
+
+    def words_for(self, allowed_mask, required_mask=0):
+        """allowed_mask 글자만 쓰고 required_mask 글자를 모두 포함하는 단어"""
+        words = []
+        for mask, group in self.groups.items():
+            if mask & ~allowed_mask == 0 and mask & required_mask == required_mask:
+                words.extend(group)
+        return words
+
+
+class KeyUnlockProgress:
+    """단계별 키 연습 진행 상태 (해제된 글자 수) - 파일로 저장"""
+
+    def __init__(self, order, path=None, initial=10):
+        self.order = order
+        self.path = path
+        self.initial = initial
+        self.unlocked = initial
+        self.load()
+
+    @property
+    def letters(self):
+        return self.order[: self.unlocked]
+
+    @property
+    def focus(self):
+        """가장 최근에 해제된 글자 (연습에서 더 자주 나오게 함)"""
+        return self.order[self.unlocked - 1] if self.unlocked > self.initial else None
+
+    @property
+    def mask(self):
+        return letter_mask(self.letters) or 0
+
+    def record_drill(self, wpm, accuracy):
+        """연습 결과가 기준을 넘으면 다음 글자 해제 (해제된 글자 반환)"""
+        if self.unlocked >= len(self.order):
+            return None
+        if accuracy < UNLOCK_MIN_ACCURACY or wpm < UNLOCK_MIN_WPM:
+            return None
+        self.unlocked += 1
+        return self.order[self.unlocked - 1]
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            self.unlocked = min(
+                len(self.order), max(self.initial, int(data.get("unlocked", 0)))
+            )
+        except Exception:
+            self.unlocked = self.initial
+
+    def dumps(self):
+        return json.dumps({"unlocked": self.unlocked}) if self.path else None
+
+    def save(self):
+        text = self.dumps()
+        if text is None:
+            return
+        try:
+            write_text_atomic(self.path, text)
+        except Exception as e:
+            print(f"키 해제 상태 저장 오류: {e}")
+
+
+class WordCorpus:
+    """큰 단어 목록/말뭉치를 한 번만 파싱해 바이너리 캐시로 저장하고 mmap 으로 읽음
+
+    캐시 형식: 헤더 + 오프셋 배열(항목 수 + 1개, uint32) + UTF-8 본문.
+    캐시 파일 이름은 원본의 절대 경로 해시로 정해진다(실행 파일 빌드에 들어 있는 파일은 실행마다
+    바뀌는 임시 폴더 대신 그 안의 상대 경로). 크기/수정 시각이 같고 앞뒤 일부의 해시가 같으면
+    바로 쓰고, 수정 시각만 다르면 전체 내용 해시로 확인한 뒤 헤더의 수정 시각을 고쳐 둔다.
+    항목은 읽을 때만 디코딩하므로 수십만 항목이어도 시작이 빠르고 메모리를 거의 쓰지 않는다.
+
+    kind: "words" - 줄마다 첫 토큰(빈도순 목록의 "단어 빈도" 형식 허용), 중복 제거
+          "lines" - 비어 있지 않은 줄 그대로
+    """
+
+    KINDS = {"words": 1, "lines": 2}
+
+    def __init__(self, data, count, offsets_start):
+        self.data = data
+        self.count = count
+        self.blob_start = offsets_start + (count + 1) * 4
+        self.offsets = memoryview(data)[offsets_start : self.blob_start].cast("I")
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("WordCorpus index out of range")
+        start = self.blob_start + self.offsets[index]
+        end = self.blob_start + self.offsets[index + 1]
+        return bytes(self.data[start:end]).decode("utf-8")
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+    @classmethod
+    def open(cls, source_path, cache_dir, kind="words", submit=None):
+        """캐시가 최신이면 mmap 으로 열고, 아니면 파싱 후 캐시를 만듦
+
+        submit: 캐시 파일 쓰기를 맡길 함수 (PersistenceWorker.submit, 없으면 바로 씀)
+        """
+        submit = submit or (lambda write, key=None: write())
+        stat = os.stat(source_path)
+        base_name = re.sub(r"[^\w.-]", "_", os.path.basename(source_path))
+        cache_name = f"{base_name}-{text_hash(cls.cache_key(source_path))[:12]}-{kind}.bin"
+        cache_path = os.path.join(cache_dir, cache_name)
+        corpus, stale_mtime = cls.load_cache(cache_path, source_path, kind, stat)
+        if corpus is not None:
+            mtime_ns = stat.st_mtime_ns if stale_mtime else None
+            submit(lambda: cls.refresh_cache(cache_path, mtime_ns))
+            return corpus
+
+        data = cls.build(cls.parse(source_path, kind), kind, stat, source_path)
+        submit(lambda: cls.write_cache(cache_dir, cache_path, data), key=cache_path)
+        return cls(data, CORPUS_CACHE_HEADER.unpack_from(data)[6], CORPUS_CACHE_HEADER.size)
+
+    @staticmethod
+    def cache_key(source_path):
+        """캐시를 구분하는 원본 위치 (실행 파일 빌드의 내장 파일은 임시 폴더 안 상대 경로)"""
+        path = os.path.abspath(source_path)
+        bundle = getattr(sys, "_MEIPASS", None)
+        if bundle and path.startswith(os.path.join(os.path.abspath(bundle), "")):
+            return "bundle:" + os.path.relpath(path, bundle)
+        return path
+
+    @staticmethod
+    def refresh_cache(cache_path, mtime_ns=None):
+        """최근 사용 표시 (오래된 캐시 정리 기준), mtime_ns 가 있으면 헤더의 수정 시각도 고침
+
+        헤더의 고정 위치 8바이트만 덮어쓰므로 파일 크기는 그대로다 (열려 있는 mmap 에 안전).
+        """
+        try:
+            if mtime_ns is not None:
+                with open(cache_path, "r+b") as file:
+                    file.seek(CORPUS_CACHE_MTIME_OFFSET)
+                    file.write(CORPUS_CACHE_MTIME.pack(mtime_ns))
+            os.utime(cache_path)
+        except OSError:
+            pass
+
+    @classmethod
+    def write_cache(cls, cache_dir, cache_path, data):
+        """임시 파일에 쓴 뒤 교체 (이전 캐시를 mmap 으로 읽는 중이어도 그 내용은 그대로 남음)"""
+        temp_path = cache_path + ".tmp"
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(temp_path, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, cache_path)
+            cls.prune_cache(cache_dir, cache_path)
+        except OSError as e:
+            print(f"말뭉치 캐시 저장 오류: {e}")
+
+    @staticmethod
+    def file_digest(path):
+        digest = hashlib.sha1()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.digest()
+
+    @staticmethod
+    def sample_digest(path, size):
+        """원본 앞뒤 CORPUS_CACHE_SAMPLE_BYTES 의 해시 (수정 시각이 같을 때의 빠른 내용 확인)"""
+        digest = hashlib.sha1()
+        with open(path, "rb") as file:
+            digest.update(file.read(CORPUS_CACHE_SAMPLE_BYTES))
+            if size > CORPUS_CACHE_SAMPLE_BYTES:
+                file.seek(max(CORPUS_CACHE_SAMPLE_BYTES, size - CORPUS_CACHE_SAMPLE_BYTES))
+                digest.update(file.read())
+        return digest.digest()
+
+    @staticmethod
+    def prune_cache(cache_dir, keep_path):
+        """최근에 쓴 CORPUS_CACHE_MAX_FILES 개만 남기고 캐시 파일 삭제"""
+        paths = [
+            os.path.join(cache_dir, name)
+            for name in os.listdir(cache_dir)
+            if name.endswith(".bin")
+        ]
+        paths.sort(key=lambda path: (path == keep_path, os.path.getmtime(path)), reverse=True)
+        for path in paths[CORPUS_CACHE_MAX_FILES:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    @classmethod
+    def load_cache(cls, cache_path, source_path, kind, stat):
+        """원본과 일치하는 캐시를 mmap 으로 열기
+
+        (캐시, 헤더의 수정 시각이 원본과 다른지) 반환, 없거나 맞지 않으면 (None, False).
+        """
+        try:
+            with open(cache_path, "rb") as file:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None, False
+        try:
+            magic, kind_code, mtime_ns, size, digest, sample, count = (
+                CORPUS_CACHE_HEADER.unpack_from(mapped)
+            )
+        except struct.error:
+            mapped.close()
+            return None, False
+        stale_mtime = mtime_ns != stat.st_mtime_ns
+        if (
+            magic != CORPUS_CACHE_MAGIC
+            or kind_code != cls.KINDS[kind]
+            or size != stat.st_size
+            or len(mapped) < CORPUS_CACHE_HEADER.size + (count + 1) * 4
+            or sample != cls.sample_digest(source_path, stat.st_size)
+            # 수정 시각이 다르면(다시 풀린 파일 등) 전체 내용 해시로 확인
+            or (stale_mtime and digest != cls.file_digest(source_path))
+        ):
+            mapped.close()
+            return None, False
+        return cls(mapped, count, CORPUS_CACHE_HEADER.size), stale_mtime
+
+    @staticmethod
+    def parse(source_path, kind):
+        entries = []
+        seen = set()
+        with open(source_path, "r", encoding="utf-8", errors="replace") as file:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                if kind == "words":
+                    if line.startswith("#"):
+                        continue
+                    line = line.split()[0]
+                    if line in seen:
+                        continue
+                    seen.add(line)
+                entries.append(line)
+        return entries
+
+    @classmethod
+    def build(cls, entries, kind, stat, source_path):
+        """항목 목록을 캐시 바이트로 직렬화"""
+        offsets = array("I", [0])
+        chunks = []
+        total = 0
+        for entry in entries:
+            encoded = entry.encode("utf-8")
+            chunks.append(encoded)
+            total += len(encoded)
+            offsets.append(total)
+        header = CORPUS_CACHE_HEADER.pack(
+            CORPUS_CACHE_MAGIC,
+            cls.KINDS[kind],
+            stat.st_mtime_ns,
+            stat.st_size,
+            cls.file_digest(source_path),
+            cls.sample_digest(source_path, stat.st_size),
+            len(entries),
+        )
+        return header + offsets.tobytes() + b"".join(chunks)
+
+
+def wrap_words(words, width=DRILL_LINE_WIDTH):
+    """단어들을 한 줄 width 글자 이내로 묶어 여러 줄 텍스트로 만듦"""
+    lines = []
+    current = []
+    length = 0
+    for word in words:
+        if current and length + 1 + len(word) > width:
+            lines.append(" ".join(current))
+            current = []
+            length = 0
+        length += len(word) + (1 if current else 0)
+        current.append(word)
+    if current:
+        lines.append(" ".join(current))
+    return "\n".join(lines)
+
+
+class TypingSession:
+    """Tk 없이 동작하는 타이핑 세션 엔진
+
+    키 입력을 받아 진행 상태(줄별 입력, 현재 위치, 정타 수)를 갱신하고
+    화면 갱신이 필요한 변화를 구독자에게 (종류, 줄 번호)로 알린다.
+      - "char": 줄 입력 내용 변경 (글자 입력/백스페이스)
+      - "indent": 자동 들여쓰기 적용
+      - "advance": 다음 줄로 이동
+      - "flash": 자동 개행 알림
+      - "complete": 모든 줄 입력 완료
+    """
+
+    def __init__(self, text="", clock=time.perf_counter):
+        self.text = text
+        self.text_lines = text.split("\n") if text else []
+        self.user_lines = [""] * len(self.text_lines)
+        self.current_line = 0
+        self.current_char_in_line = 0
+        self.correct_chars = 0
+        self.total_chars = 0
+        # 진행률 계산용: 총 글자 수는 한 번만 계산하고 완료 글자 수는 증분 유지
+        self.progress_total_chars = sum(len(line) for line in self.text_lines)
+        self.completed_line_chars = 0
+        self.completed = False
+        self.listeners = []
+        # 키 입력 기록 (시각은 clock 기준, 첫 키 입력 시점이 0)
+        self.clock = clock
+        self.started = None
+        self.log = KeystrokeLog()
+        # 기록 재생으로 만든 세션은 점수/통계에 반영하지 않음
+        self.scoring = True
+
+    def subscribe(self, listener):
+        """변화 알림을 받을 콜백 등록: listener(종류, 줄 번호)"""
+        self.listeners.append(listener)
+
+    def emit(self, kind, line_index=None):
+        for listener in self.listeners:
+            listener(kind, line_index)
+
+    def elapsed_ms(self):
+        """첫 키 입력 이후 경과 시간 (ms)"""
+        now = self.clock()
+        if self.started is None:
+            self.started = now
+        return int((now - self.started) * 1000)
+
+    def start(self):
+        """첫 줄 자동 들여쓰기 적용 (구독자 등록 후 호출)"""
+        self.apply_auto_indent()
+
+    def apply_auto_indent(self):
+        """현재 줄의 선행 공백만큼 자동 들여쓰기 및 현재 위치 보정"""
+        if self.current_line >= len(self.text_lines):
+            return
+
+        line_text = self.text_lines[self.current_line]
+        leading_spaces = len(line_text) - len(line_text.lstrip(" "))
+
+        # 사용자 입력 버퍼에 선행 공백을 자동 삽입하고 현재 위치를 첫 글자에 놓음
+        # (이미 들여써졌으면 중복으로 넣지 않음)
+        if len(self.user_lines[self.current_line]) < leading_spaces:
+            self.user_lines[self.current_line] = " " * leading_spaces
+        self.current_char_in_line = max(self.current_char_in_line, leading_spaces)
+        self.emit("indent", self.current_line)
+
+    def feed_char(self, char):
+        """문자 하나 입력 (드보락 매핑이 끝난 문자)"""
+        if self.current_line >= len(self.text_lines):
+            return
+
+        current_line_text = self.text_lines[self.current_line]
+
+        # 현재 줄이 가득 찼으면 자동 개행 후 시각적 피드백(깜빡임)
+        if self.current_char_in_line >= len(current_line_text):
+            prev_line = self.current_line
+            self.move_to_next_line()
+            # 모든 줄을 마친 경우 종료
+            if self.current_line == prev_line:
+                return
+            self.emit("flash", self.current_line)
+            current_line_text = self.text_lines[self.current_line]
+
+        # 현재 줄 길이를 초과하면 더 이상 입력하지 않음
+        if self.current_char_in_line >= len(current_line_text):
+            self.move_to_next_line()
+            self.emit("flash", self.current_line)
+            # 새 줄의 자동 들여쓰기 적용
+            self.apply_auto_indent()
+            return
+
+        expected_char = current_line_text[self.current_char_in_line]
+
+        # 사용자 입력 줄 업데이트 (틀린 글자도 그대로 기록해 빨간색 표시)
+        self.user_lines[self.current_line] += char
+        self.total_chars += 1
+        flags = 0
+        if char == expected_char:
+            self.correct_chars += 1
+            flags = KeystrokeLog.FLAG_CORRECT
+        self.log.append(
+            self.elapsed_ms(),
+            ord(expected_char),
+            ord(char),
+            self.current_line,
+            self.current_char_in_line,
+            flags,
+        )
+        self.current_char_in_line += 1
+        self.emit("char", self.current_line)
+
+        # 줄 완료 체크: 자동으로 다음 줄 이동
+        if self.current_char_in_line >= len(current_line_text):
+            self.move_to_next_line()
+            self.emit("flash", self.current_line)
+            # 새 줄의 자동 들여쓰기 적용
+            self.apply_auto_indent()
+
+    def backspace(self):
+        """현재 줄에서 한 글자 지우기 (이전 줄로는 돌아가지 않음)"""
+        if self.current_char_in_line > 0:
+            self.current_char_in_line -= 1
+            if len(self.user_lines[self.current_line]) > 0:
+                self.user_lines[self.current_line] = self.user_lines[self.current_line][
+                    :-1
+                ]
+                self.log.append(
+                    self.elapsed_ms(),
+                    0,
+                    0,
+                    self.current_line,
+                    self.current_char_in_line,
+                    KeystrokeLog.FLAG_BACKSPACE,
+                )
+                self.emit("char", self.current_line)
+
+    def enter(self):
+        """Enter: 현재 줄을 끝까지 입력했을 때만 다음 줄로 이동"""
+        if self.current_line < len(self.text_lines) and self.current_char_in_line >= len(
+            self.text_lines[self.current_line]
+        ):
+            self.log.append(
+                self.elapsed_ms(),
+                0,
+                0,
+                self.current_line,
+                self.current_char_in_line,
+                KeystrokeLog.FLAG_ENTER,
+            )
+            self.move_to_next_line()
+
+    def move_to_next_line(self):
+        """다음 줄로 이동 (마지막 줄이면 완료 여부 확인)"""
+        if self.current_line < len(self.text_lines) - 1:
+            self.completed_line_chars += len(self.text_lines[self.current_line])
+            self.current_line += 1
+            self.current_char_in_line = 0
+            self.emit("advance", self.current_line)
+            # 자동 들여쓰기 적용
+            self.apply_auto_indent()
+        elif self.is_complete():
+            self.completed = True
+            self.emit("complete", self.current_line)
+
+    def is_complete(self):
+        """마지막 줄의 마지막 문자까지 입력했는지 여부"""
+        return (
+            len(self.text_lines) > 0
+            and self.current_line == len(self.text_lines) - 1
+            and self.current_char_in_line >= len(self.text_lines[-1])
+        )
+
+    def progress(self):
+        """진행률(%) - 완료한 줄의 글자 수 + 현재 줄의 진행 상황 (상수 시간)"""
+        if self.progress_total_chars <= 0:
+            return 0
+        completed_chars = self.completed_line_chars
+        if self.current_line < len(self.text_lines):
+            completed_chars += min(
+                self.current_char_in_line, len(self.text_lines[self.current_line])
+            )
+        return (completed_chars / self.progress_total_chars) * 100
+
+    def accuracy(self):
+        """정확도(%)"""
+        if self.total_chars <= 0:
+            return 0
+        return (self.correct_chars / self.total_chars) * 100
+
+
+class SessionReplay:
+    """키 입력 기록을 세션 엔진에 시각 순서대로 다시 입력"""
+
+    def __init__(self, session, log, speed=1):
+        self.session = session
+        self.log = log
+        self.speed = speed
+        self.position = 0
+
+    @property
+    def done(self):
+        return self.position >= len(self.log)
+
+    def feed_until(self, time_ms):
+        """기록 시각이 time_ms 이하인 키 입력까지 재생 (이진 탐색으로 범위 결정)"""
+        end = bisect.bisect_right(self.log.times, time_ms, self.position)
+        log = self.log
+        for i in range(self.position, end):
+            flags = log.flags[i]
+            if flags & KeystrokeLog.FLAG_BACKSPACE:
+                self.session.backspace()
+            elif flags & KeystrokeLog.FLAG_ENTER:
+                self.session.enter()
+            else:
+                self.session.feed_char(chr(log.typed[i]))
+        self.position = end
+
+    def feed_all(self):
+        if len(self.log):
+            self.feed_until(self.log.times[-1])
+
+
+class GhostRun:
+    """최고 기록의 키 입력 시각별 위치 - 매 프레임 이진 탐색으로 현재 위치를 구함"""
+
+    __slots__ = ("times", "lines", "columns", "start_position")
+
+    def __init__(self, text, log):
+        # 기록을 세션 엔진에 다시 입력하며 키마다 (줄, 열) 위치를 미리 계산
+        session = TypingSession(text)
+        session.start()
+        self.start_position = (session.current_line, session.current_char_in_line)
+        replay = SessionReplay(session, log)
+        self.times = array("I", log.times)
+        self.lines = array("I")
+        self.columns = array("I")
+        for time_ms in log.times:
+            replay.feed_until(time_ms)
+            self.lines.append(session.current_line)
+            self.columns.append(session.current_char_in_line)
+
+    @property
+    def duration_ms(self):
+        return self.times[-1] if self.times else 0
+
+    def position_at(self, time_ms):
+        """time_ms 시점의 (줄, 열)"""
+        i = bisect.bisect_right(self.times, time_ms) - 1
+        if i < 0:
+            return self.start_position
+        return self.lines[i], self.columns[i]
 
 
 class DvorakTypingTrainer:
+    # 타이핑 진행 상태는 TypingSession(self.session)이 소유하며 기존 이름으로 읽을 수 있음
+    text_lines = property(lambda self: self.session.text_lines)
+    user_lines = property(lambda self: self.session.user_lines)
+    current_line = property(lambda self: self.session.current_line)
+    current_char_in_line = property(lambda self: self.session.current_char_in_line)
+    correct_chars = property(lambda self: self.session.correct_chars)
+    total_chars = property(lambda self: self.session.total_chars)
+
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("드보락 키보드 타자연습 & 코딩 연습")
@@ -22,26 +1976,64 @@ class DvorakTypingTrainer:
         self.start_time = None
         self.is_typing = False
         self.current_position = 0
-        self.correct_chars = 0
-        self.total_chars = 0
-
-        # 사용자 이름 (기본값 또는 저장된 값)
-        self.user_name = "Player"
-        self.load_user_name()
 
-        # 텍스트 줄별 관리
-        self.text_lines = []
-        self.user_lines = []
-        self.current_line = 0
-        self.current_char_in_line = 0
+        # 통계 기록과 사용자 이름 (파일은 첫 화면을 띄운 뒤 또는 처음 필요할 때 한 번만 읽음)
+        self.stats_file = "typing_stats.json"
+        self.stats = StatsRepository(self.stats_file)
+        # 점수판/통계 질의용 세션 색인 (통계를 읽을 때 열림, sqlite3 가 없으면 None)
+        self.session_store = None
+
+        # 텍스트 줄별 관리 (진행 상태는 세션 엔진, 위젯 렌더링 상태는 여기서 관리)
+        self.session = TypingSession()
+        self.rendered_user_lines = []
+        self.line_runs = []
+        # 전체 텍스트 렌더링(display_text) 횟수 - benchmark.py 가 세션 시작당 1회인지 확인
+        self.render_count = 0
+        # 프레임 단위로 합쳐서 반영할 위젯 갱신 (schedule_render/flush_render)
+        self.frame_budget_ms = FRAME_BUDGET_MS
+        self.render_job = None
+        self.dirty_lines = set()
+        self.dirty_parts = set()
+        self.pending_key_char = None
+        self.last_flush_time = 0.0
+        # 입력 지연 진단 (오버레이를 켰을 때만 기록)
+        self.latency_recorder = None
+        self.latency_overlay = None
+        self.latency_overlay_job = None
+        self.pending_key_times = []
+        self.syntax_time = 0.0
+        # 세션 재생 (재생 중에는 키 입력을 받지 않음)
+        self.replay = None
+        self.replay_job = None
+        self.replay_started = 0.0
+        self.replay_saved_mode = None
+        self.last_replay_source = None
+        # 고스트 레이스 (같은 텍스트의 최고 기록과 함께 입력)
+        self.ghost_enabled = False
+        self.ghost = None
+        self.ghost_job = None
+        self.ghost_started = 0.0
+        # 저장 스레드에서 불러오는 고스트: 요청 번호, 불러오는 중 여부, (요청 번호, GhostRun) 결과
+        self.ghost_request = 0
+        self.ghost_loading = False
+        self.ghost_result = None
+        self.ghost_mark = None
+        # 위젯에 올라가 있는 원문 줄 범위 [viewport_start, viewport_end)
+        self.viewport_windowed = False
+        self.viewport_start = 0
+        self.viewport_end = 0
+        self.syntax_line_spans = None
 
         # 코딩 모드 관련 변수
         self.is_coding_mode = False
         self.is_practice_mode = False  # 연습 모드 (점수 기록 없음)
+        self.practice_text_generator = self.generate_practice_mode_text
         self.current_language = "python"
         self.current_difficulty = "basic"
         self.coding_templates = {}
         self.load_coding_templates()
+        # 문법 하이라이팅 토크나이저 (언어별 정규식 캐시 포함)
+        self.syntax_tokenizer = SyntaxTokenizer()
 
         # 연습 모드용 쉬운 단어 목록
         self.practice_words = [
@@ -254,9 +2246,31 @@ class DvorakTypingTrainer:
         self.dvorak_key_labels = {}
         self.last_highlighted_key_label = None
 
-        # 통계 데이터
-        self.stats_file = "typing_stats.json"
-        self.load_stats()
+        # 파일 저장은 백그라운드 스레드에서 (종료 시 남은 저장을 마침)
+        self.persistence = PersistenceWorker()
+        # 저장 스레드가 아직 파일로 쓰지 않은 키 입력 기록 (통계 파일 기준 상대 경로 -> (header, log))
+        self.unsaved_keystroke_logs = {}
+
+        # 문법 하이라이팅 구간 캐시 (통계 파일과 같은 폴더에 저장)
+        self.highlight_cache = HighlightCache(self.data_path(HIGHLIGHT_CACHE_FILE))
+        # 약점 키 가중 단어 샘플러 (단어 목록/키 통계가 바뀔 때만 다시 계산)
+        self.word_sampler = None
+        self.word_sampler_source = None
+        self.word_sampler_revision = None
+        # 키/바이그램별 입력 간격 통계 (세션이 끝날 때마다 누적)
+        self.key_stats = KeyLatencyStats(self.data_path(KEY_STATS_FILE))
+
+        # 설정에 저장된 외부 단어 목록이 있으면 사용 (캐시가 최신이면 파싱 없이 바로 열림)
+        self.user_settings = self.load_user_settings()
+        self.word_corpus = None
+        word_list = self.user_settings.get("word_list")
+        if word_list and os.path.exists(word_list):
+            try:
+                self.load_word_list(word_list)
+            except (OSError, ValueError) as e:
+                print(f"단어 목록 로드 오류: {e}")
+        # 말뭉치 연습용 긴 텍스트 (처음 말뭉치 연습을 시작할 때 열림)
+        self.text_corpus = None
 
         # 드보락 레이아웃 표시 (이미지 기준)
         self.dvorak_layout = [
@@ -266,6 +2280,19 @@ class DvorakTypingTrainer:
             ["", ";", "q", "j", "k", "x", "b", "m", "w", "v", "z", "", "", ""],
         ]
 
+        # 단계별 키 연습: 홈 row(a o e u i d h t n s)부터 시작해 빈도순으로 글자 해제
+        home_row = [key for key in self.dvorak_layout[2] if key.isalpha()]
+        unlock_order = "".join(home_row) + "".join(
+            char for char in ENGLISH_LETTER_FREQUENCY if char not in home_row
+        )
+        self.unlock_progress = KeyUnlockProgress(
+            unlock_order,
+            self.data_path(UNLOCK_STATE_FILE),
+            initial=len(home_row),
+        )
+        self.letter_index = None
+        self.letter_index_source = None
+
         # 사이즈 설정 (사이드 패널과 키 표시 확대용)
         self.side_panel_width = 340  # 기존 250에서 확대
         self.keyboard_key_width = 3  # 기존 2에서 확대
@@ -275,9 +2302,12 @@ class DvorakTypingTrainer:
         self.keyboard_empty_size = 26  # 빈 공간 크기(기존 20에서 확대)
 
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # 초기 언어 선택 화면 표시
         self.show_language_selection()
+        # 통계 파일은 첫 화면이 그려진 뒤 읽음
+        self.root.after_idle(self.load_stats)
 
     def setup_ui(self):
         # 메인 컨테이너 및 레이아웃 가중치
@@ -434,6 +2464,63 @@ class DvorakTypingTrainer:
         )
         practice_btn.pack(pady=10)
 
+        # 약점 키 연습 버튼 (키 통계에서 느리거나 자주 틀리는 글자 위주)
+        weak_key_btn = tk.Button(
+            self.language_selection_frame,
+            text="🎯 약점 키 연습",
+            font=("맑은 고딕", 16, "bold"),
+            bg="#1a1a1a",
+            fg="#ffaa00",
+            activebackground="#2d2d2d",
+            activeforeground="#ffaa00",
+            relief="raised",
+            bd=2,
+            padx=40,
+            pady=15,
+            highlightbackground="#ffaa00",
+            highlightcolor="#ffaa00",
+            command=lambda: self.start_practice_mode(self.generate_weak_key_drill),
+        )
+        weak_key_btn.pack(pady=10)
+
+        # 단계별 키 연습 버튼 (홈 row 부터 기준을 넘을 때마다 글자 해제)
+        unlock_btn = tk.Button(
+            self.language_selection_frame,
+            text="🔓 단계별 키 연습",
+            font=("맑은 고딕", 16, "bold"),
+            bg="#1a1a1a",
+            fg="#cc99ff",
+            activebackground="#2d2d2d",
+            activeforeground="#cc99ff",
+            relief="raised",
+            bd=2,
+            padx=40,
+            pady=15,
+            highlightbackground="#cc99ff",
+            highlightcolor="#cc99ff",
+            command=self.start_unlock_practice,
+        )
+        unlock_btn.pack(pady=10)
+
+        # 말뭉치 연습 버튼 (불러온 긴 텍스트에서 임의 위치의 몇 줄)
+        corpus_btn = tk.Button(
+            self.language_selection_frame,
+            text="📚 말뭉치 연습",
+            font=("맑은 고딕", 16, "bold"),
+            bg="#1a1a1a",
+            fg="#66ddaa",
+            activebackground="#2d2d2d",
+            activeforeground="#66ddaa",
+            relief="raised",
+            bd=2,
+            padx=40,
+            pady=15,
+            highlightbackground="#66ddaa",
+            highlightcolor="#66ddaa",
+            command=self.start_corpus_practice,
+        )
+        corpus_btn.pack(pady=10)
+
         # 구분선
         separator = tk.Frame(
             self.language_selection_frame, bg="#404040", height=2, width=300
@@ -484,15 +2571,8 @@ class DvorakTypingTrainer:
         )
         desc_label.pack(pady=(20, 0))
 
-    def start_practice_mode(self):
-        """연습 모드 시작 (점수 기록 없음, 쉬운 단어)"""
-        self.is_practice_mode = True
-        self.is_coding_mode = False
-
-        # 모드 표시 업데이트
-        if hasattr(self, "mode_label"):
-            self.mode_label.config(text="[연습 모드]")
-
+    def show_typing_view(self):
+        """언어 선택 화면을 닫고 타자 화면(좌/우/하단 패널과 텍스트 위젯) 복원"""
         # 언어 선택 화면 닫기
         if hasattr(self, "language_selection_frame"):
             try:
@@ -514,15 +2594,31 @@ class DvorakTypingTrainer:
                 row=2, column=0, sticky=(tk.W, tk.E), padx=10, pady=5
             )
 
-        # 텍스트 위젯 다시 표시
+        # 텍스트 위젯 다시 표시 (스크롤바는 숨김 유지)
         self.text_display.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         if hasattr(self, "header_frame"):
             self.header_frame.lift()
 
-        # 연습 모드 텍스트 생성
-        self.current_text = self.generate_practice_mode_text()
-        self.display_text()
-        self.reset_practice()
+    def start_practice_mode(self, text_generator=None):
+        """연습 모드 시작 (점수 기록 없음, 쉬운 단어)
+
+        text_generator: 새 연습마다 텍스트를 만드는 함수 (기본: 쉬운 단어)
+        """
+        self.is_practice_mode = True
+        self.is_coding_mode = False
+        self.practice_text_generator = (
+            text_generator or self.generate_practice_mode_text
+        )
+
+        # 모드 표시 업데이트
+        if hasattr(self, "mode_label"):
+            self.mode_label.config(text="[연습 모드]")
+
+        # 언어 선택 화면을 닫고 타자 화면 표시
+        self.show_typing_view()
+
+        # 연습 모드 텍스트로 새 세션 시작
+        self.start_session(self.practice_text_generator())
 
         # 라이브 통계 초기화
         if hasattr(self, "live_time_label"):
@@ -533,18 +2629,73 @@ class DvorakTypingTrainer:
             self.live_acc_label.config(text="0%")
 
     def generate_practice_mode_text(self):
-        """연습 모드용 쉬운 단어 텍스트 생성"""
-        import random
-
-        # 10-15개의 단어를 랜덤하게 선택하여 문장 생성 (더 짧게)
+        """연습 모드용 쉬운 단어 텍스트 생성 (약한 키가 든 단어를 더 자주 선택)"""
+        # 2-5개의 단어를 선택하여 짧은 문장 생성
         num_words = random.randint(2, 5)
-        selected_words = random.sample(
-            self.practice_words, min(num_words, len(self.practice_words))
-        )
+        selected_words = self.get_word_sampler().sample_unique(num_words)
         # 단어들을 공백으로 연결
         text = " ".join(selected_words)
         return text
 
+    def generate_weak_key_drill(self, word_count=WEAK_KEY_DRILL_WORDS):
+        """약한 키/바이그램 위주의 단어 연습 텍스트 (여러 줄)"""
+        return wrap_words(self.get_word_sampler().sample(word_count))
+
+    def generate_unlock_drill(self, word_count=UNLOCK_DRILL_WORDS):
+        """해제된 글자만으로 이루어진 단어 연습 (절반은 새로 해제된 글자 포함)"""
+        progress = self.unlock_progress
+        index = self.get_letter_index()
+        words = index.words_for(progress.mask)
+        focus_words = []
+        if progress.focus:
+            focus_words = index.words_for(progress.mask, letter_mask(progress.focus))
+
+        # 단어가 부족하거나 새 글자가 든 단어가 없으면 해제된 글자로 만든 가짜 단어로 보충
+        letters = progress.letters
+        if len(set(words)) < 10 or (progress.focus and not focus_words):
+            for _ in range(word_count):
+                length = random.randint(3, 6)
+                pseudo = "".join(random.choice(letters) for _ in range(length))
+                if progress.focus and progress.focus not in pseudo:
+                    pseudo = progress.focus + pseudo[1:]
+                words.append(pseudo)
+                if progress.focus:
+                    focus_words.append(pseudo)
+
+        picked = random.choices(focus_words, k=word_count // 2) if focus_words else []
+        picked += random.choices(words, k=word_count - len(picked))
+        random.shuffle(picked)
+        return wrap_words(picked)
+
+    def get_letter_index(self):
+        """현재 단어 목록의 글자 마스크 색인 (목록이 바뀐 경우에만 다시 만듦)"""
+        if self.letter_index is None or self.letter_index_source is not self.practice_words:
+            self.letter_index = LetterMaskIndex(self.practice_words)
+            self.letter_index_source = self.practice_words
+        return self.letter_index
+
+    def start_unlock_practice(self):
+        """단계별 키 연습 시작"""
+        self.start_practice_mode(self.generate_unlock_drill)
+        self.update_unlock_label()
+
+    def update_unlock_label(self):
+        if hasattr(self, "mode_label"):
+            self.mode_label.config(
+                text=f"[단계별 연습: {' '.join(self.unlock_progress.letters)}]"
+            )
+
+    def get_word_sampler(self):
+        """현재 단어 목록과 키 통계에 맞는 샘플러 (바뀐 경우에만 다시 계산)"""
+        if self.word_sampler is None or self.word_sampler_source is not self.practice_words:
+            self.word_sampler = WeightedWordSampler(self.practice_words)
+            self.word_sampler_source = self.practice_words
+            self.word_sampler_revision = None
+        if self.word_sampler_revision != self.key_stats.revision:
+            self.word_sampler.set_weights(self.key_stats.weak_features())
+            self.word_sampler_revision = self.key_stats.revision
+        return self.word_sampler
+
     def select_language_and_difficulty(self, language):
         """언어 선택 후 난이도 선택 창을 표시하고 시작"""
         self.current_language = language
@@ -593,31 +2744,8 @@ class DvorakTypingTrainer:
                 lang_name = language.upper()
                 self.mode_label.config(text=f"[{lang_name} - {difficulty_key}]")
 
-            # 언어 선택 화면 닫기
-            if hasattr(self, "language_selection_frame"):
-                try:
-                    self.language_selection_frame.destroy()
-                except Exception:
-                    pass
-
-            # 좌/우/하단 패널 복원
-            if hasattr(self, "typing_frame"):
-                self.typing_frame.grid(
-                    row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=(0, 10)
-                )
-            if hasattr(self, "side_frame"):
-                self.side_frame.grid(
-                    row=0, column=1, sticky=(tk.W, tk.E, tk.N, tk.S), padx=(0, 0)
-                )
-            if hasattr(self, "bottom_frame"):
-                self.bottom_frame.grid(
-                    row=2, column=0, sticky=(tk.W, tk.E), padx=10, pady=5
-                )
-
-            # 텍스트 위젯 다시 표시 (스크롤바는 숨김 유지)
-            self.text_display.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-            if hasattr(self, "header_frame"):
-                self.header_frame.lift()
+            # 언어 선택 화면을 닫고 타자 화면 표시
+            self.show_typing_view()
 
             # 새 연습 시작 (coding_templates.json 사용)
             self.start_new_practice()
@@ -709,16 +2837,9 @@ int main() {
         else:
             self.current_text = "기본 타자 연습 텍스트입니다."
 
-        # 텍스트를 줄 단위로 분리
-        self.text_lines = self.current_text.split("\n")
-        self.user_lines = [""] * len(self.text_lines)
-
-        # 통계 초기화
+        # 통계 초기화 및 텍스트 표시
         self.reset_practice()
 
-        # 텍스트 표시
-        self.display_text()
-
     def setup_typing_area(self, parent):
         """타자연습 메인 영역"""
         self.typing_frame = tk.Frame(parent, bg="#1a1a1a", relief="sunken", bd=2)
@@ -744,6 +2865,12 @@ int main() {
         # 텍스트 길이에 따라 부모 프레임 크기가 바뀌지 않도록 고정
         text_container.grid_propagate(False)
 
+        # 텍스트 위젯과 들여쓰기 계산에 공용으로 쓰는 폰트 (측정 결과는 폭별로 캐시)
+        self.text_font = tkfont.Font(font=("Consolas", 14))
+        self.indent_px_cache = {}
+        # 현재 태그 테이블에 설정된 들여쓰기 태그 (폭별 하나)
+        self.indent_tags = set()
+
         # 텍스트 위젯 (줄별 표시용)
         self.text_display = tk.Text(
             text_container,
@@ -764,6 +2891,10 @@ int main() {
         )
         self.text_display.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
 
+        # 키보드 이벤트 바인딩 (위젯 생성 시 한 번만)
+        self.text_display.bind("<KeyPress>", self.on_key_press)
+        self.text_display.bind("<Button-1>", lambda e: self.text_display.focus_set())
+
         # 스크롤바 (인스턴스 변수로 저장하여 필요 시 숨김/표시)
         self.v_scrollbar = ttk.Scrollbar(
             text_container, orient="vertical", command=self.text_display.yview
@@ -1270,20 +3401,24 @@ int main() {
     def start_new_practice(self):
         """새로운 연습 시작"""
         if self.is_practice_mode:
-            # 연습 모드: 쉬운 단어 사용
-            self.current_text = self.generate_practice_mode_text()
+            # 연습 모드: 시작할 때 고른 방식(쉬운 단어/약점 키 등)으로 생성
+            text = self.practice_text_generator()
         elif self.is_coding_mode:
             # 코딩 모드: 코딩 템플릿 사용
-            self.current_text = self.generate_coding_text()
+            text = self.generate_coding_text()
         else:
             # 일반 타자 연습
-            self.current_text = self.generate_practice_text()
+            text = self.generate_practice_text()
 
-        if self.current_text:
-            self.display_text()
-            self.reset_practice()
+        if text:
+            self.start_session(text)
         # status_label 제거됨
 
+    def start_session(self, text):
+        """새 세션 시작 (상태 초기화와 렌더링을 각각 정확히 한 번 수행)"""
+        self.current_text = text
+        self.reset_practice()
+
     def generate_practice_text(self):
         """연습용 텍스트 생성 (실제적인 드보락 연습용)"""
         # 드보락 키보드 연습용 텍스트 - 실제 사용에 가까운 내용
@@ -1326,78 +3461,119 @@ int main() {
 
     def display_text(self):
         """텍스트를 한컴타자연습 스타일로 표시"""
+        # 세션 시작당 렌더링 횟수 확인용
+        self.render_count += 1
+        # 이전 세션에서 예약된 위젯 갱신은 버림
+        self.cancel_pending_render()
         self.text_display.config(state=tk.NORMAL)
         self.text_display.delete(1.0, tk.END)
 
-        # 텍스트를 줄별로 분리
-        self.text_lines = self.current_text.split("\n")
-        self.user_lines = [""] * len(self.text_lines)
+        # 위젯에 실제로 그려진 사용자 입력 (증분 렌더링 비교용)
+        self.rendered_user_lines = [""] * len(self.text_lines)
+        self.line_runs = [CorrectnessRuns() for _ in self.text_lines]
 
-        # 태그 설정
+        # 태그 설정 (이전 세션의 들여쓰기 태그 정리 포함)
+        self.clear_indent_tags()
         self.setup_text_tags()
 
+        # 큰 문서는 현재 줄 주변만 위젯에 올리는 창 모드로 표시
+        self.viewport_windowed = len(self.text_lines) > VIEWPORT_MIN_LINES
+        self.viewport_start = 0
+        self.viewport_end = 0
+        self.syntax_line_spans = None
+        if self.viewport_windowed:
+            self.render_lines(0, min(len(self.text_lines), VIEWPORT_LINES_AFTER))
+        else:
+            self.render_lines(0, len(self.text_lines))
+
+        self.text_display.config(state=tk.DISABLED)
+
+        self.text_display.focus_set()
+
+        # 첫 줄 들여쓰기 자동 적용
+        self.session.start()
+        # 캐럿 깜빡임 시작
+        self.start_caret_blink()
+        # 초기 캐럿 표시를 위해 예약된 갱신을 즉시 반영
+        self.flush_render()
+
+    def original_row(self, line_index):
+        """원문 줄의 위젯 줄 번호 (창 모드에서는 창 시작 기준)"""
+        return (line_index - self.viewport_start) * 2 + 1
+
+    def user_row(self, line_index):
+        """사용자 입력 줄의 위젯 줄 번호 (창 모드에서는 창 시작 기준)"""
+        return (line_index - self.viewport_start) * 2 + 2
+
+    def render_lines(self, start, end):
+        """원문 start ~ end-1 줄을 원문/사용자 입력 줄 쌍으로 위젯 끝에 추가"""
+        if start >= end:
+            return
+
         # 각 줄을 원문-사용자입력 쌍으로 표시
         display_lines = []
-        for i, line in enumerate(self.text_lines):
+        for line in self.text_lines[start:end]:
             # 원문 줄
             display_lines.append(line)
             # 사용자 입력 줄 (빈 줄)
             display_lines.append("")
 
-        # 전체 텍스트 삽입
-        full_text = "\n".join(display_lines)
-        self.text_display.insert(1.0, full_text)
+        # 이미 올라간 줄이 있으면 마지막 사용자 입력 줄 뒤에 이어 붙임
+        chunk = "\n".join(display_lines)
+        if self.viewport_end > self.viewport_start:
+            self.text_display.insert(tk.END, "\n" + chunk)
+        else:
+            self.text_display.insert(1.0, chunk)
+        self.viewport_end = end
 
         # 태그 적용
-        for i, line in enumerate(self.text_lines):
+        for i in range(start, end):
             # 원문 줄 태그
-            line_start = f"{i*2 + 1}.0"
-            line_end = f"{i*2 + 1}.end"
-            self.text_display.tag_add("original", line_start, line_end)
+            row = self.original_row(i)
+            self.text_display.tag_add("original", f"{row}.0", f"{row}.end")
 
             # 사용자 입력 줄 태그
-            user_line_start = f"{i*2 + 2}.0"
-            user_line_end = f"{i*2 + 2}.end"
+            user_line_start = f"{row + 1}.0"
+            user_line_end = f"{row + 1}.end"
             self.text_display.tag_add("user_input", user_line_start, user_line_end)
 
             # 사용자 입력 줄을 원문 들여쓰기와 정렬되도록 왼쪽 마진을 부여
             try:
-                import tkinter.font as tkfont
-
-                font = tkfont.Font(font=("Consolas", 14))
                 leading_spaces = len(self.text_lines[i]) - len(
                     self.text_lines[i].lstrip(" ")
                 )
-                indent_px = font.measure(" " * leading_spaces)
-                indent_tag = f"user_indent_{i}"
-                self.text_display.tag_configure(
-                    indent_tag, lmargin1=indent_px, lmargin2=indent_px
-                )
+                indent_tag = self.get_indent_tag(leading_spaces)
                 self.text_display.tag_add(indent_tag, user_line_start, user_line_end)
             except Exception:
                 pass
 
-        # 코딩 모드일 때 문법 하이라이팅 적용
+        # 코딩 모드일 때 문법 하이라이팅 적용 (새로 올린 줄만)
         if self.is_coding_mode:
-            self.apply_syntax_highlighting()
+            self.apply_syntax_highlighting(start, end)
 
-        self.text_display.config(state=tk.DISABLED)
-
-        # 현재 위치 초기화
-        self.current_line = 0
-        self.current_char_in_line = 0
-
-        # 키보드 이벤트 바인딩
-        self.text_display.bind("<KeyPress>", self.on_key_press)
-        self.text_display.bind("<Button-1>", lambda e: self.text_display.focus_set())
-        self.text_display.focus_set()
+    def update_viewport(self):
+        """창 모드에서 현재 줄 앞쪽 줄을 미리 올리고 완료된 줄을 위젯에서 제거"""
+        if not self.viewport_windowed:
+            return
+        total = len(self.text_lines)
+        ahead = self.viewport_end - self.current_line
+        behind = self.current_line - self.viewport_start
+        if ahead >= VIEWPORT_LINES_AFTER // 2 and behind <= VIEWPORT_LINES_BEFORE * 2:
+            return
 
-        # 첫 줄 들여쓰기 자동 적용
-        self.apply_auto_indent_for_current_line()
-        # 캐럿 깜빡임 시작
-        self.start_caret_blink()
-        # 초기 캐럿 표시를 위해 한 번 라인 갱신
-        self.update_user_line()
+        self.text_display.config(state=tk.NORMAL)
+        # 앞쪽 줄 페이지 단위로 추가
+        if ahead < VIEWPORT_LINES_AFTER // 2 and self.viewport_end < total:
+            self.render_lines(
+                self.viewport_end,
+                min(total, self.current_line + VIEWPORT_LINES_AFTER),
+            )
+        # 입력이 끝난 줄은 위젯에서 제거 (이전 줄로는 돌아갈 수 없음)
+        if behind > VIEWPORT_LINES_BEFORE * 2:
+            new_start = self.current_line - VIEWPORT_LINES_BEFORE
+            self.text_display.delete("1.0", f"{self.original_row(new_start)}.0")
+            self.viewport_start = new_start
+        self.text_display.config(state=tk.DISABLED)
 
     def setup_text_tags(self):
         """텍스트 태그 설정 (다크 테마)"""
@@ -1445,9 +3621,17 @@ int main() {
         self.text_display.tag_configure(
             "caret", background="#4a4a00", foreground="#ffff99", font=base_font
         )
+        # 고스트(최고 기록) 위치 - 원문 줄에 표시
+        self.text_display.tag_configure(
+            "ghost", background="#004466", foreground="#99ddff", font=base_font
+        )
+        self.text_display.tag_raise("ghost")
 
     def start_caret_blink(self):
-        """현재 위치에서 캐럿 깜빡임 시작"""
+        """현재 위치에서 캐럿 깜빡임 시작 (이전 깜빡임 타이머는 취소)"""
+        if getattr(self, "caret_blink_job", None) is not None:
+            self.root.after_cancel(self.caret_blink_job)
+            self.caret_blink_job = None
         self.caret_blink_on = True
         self._blink_caret()
 
@@ -1463,7 +3647,7 @@ int main() {
             return
         # 현재 위치에 caret 토글
         if self.current_line < len(self.text_lines):
-            user_line_num = self.current_line * 2 + 2
+            user_line_num = self.user_row(self.current_line)
             start = f"{user_line_num}.{self.current_char_in_line}"
             end = f"{user_line_num}.{self.current_char_in_line + 1}"
             self.text_display.config(state=tk.NORMAL)
@@ -1480,47 +3664,60 @@ int main() {
                 self.text_display.tag_add("caret", start, end)
             self.text_display.config(state=tk.DISABLED)
         # 500ms 후 반복
-        self.root.after(500, self._blink_caret)
-
-    def apply_auto_indent_for_current_line(self):
-        """현재 줄의 선행 공백만큼 자동 들여쓰기 및 캐럿 위치 보정"""
-        if self.current_line >= len(self.text_lines):
-            return
+        self.caret_blink_job = self.root.after(500, self._blink_caret)
 
-        line_text = self.text_lines[self.current_line]
-        leading_spaces = len(line_text) - len(line_text.lstrip(" "))
-
-        # 사용자 입력 버퍼에 선행 공백을 자동 삽입하고 현재 위치를 첫 글자에 놓음
-        if self.current_line < len(self.user_lines):
-            # 이미 들여써졌으면 중복으로 넣지 않음
-            if len(self.user_lines[self.current_line]) < leading_spaces:
-                self.user_lines[self.current_line] = " " * leading_spaces
-            # 커서/현재 위치 보정
-            self.current_char_in_line = max(self.current_char_in_line, leading_spaces)
-
-        # 텍스트 위젯에 들여쓰기 반영
+    def apply_indent_tag(self, line_index):
+        """사용자 입력 줄에 원문 선행 공백 폭의 들여쓰기 태그 적용"""
         try:
-            import tkinter.font as tkfont
-
-            user_line_num = self.current_line * 2 + 2
+            line_text = self.text_lines[line_index]
+            leading_spaces = len(line_text) - len(line_text.lstrip(" "))
+            user_line_num = self.user_row(line_index)
             user_line_start = f"{user_line_num}.0"
             user_line_end = f"{user_line_num}.end"
-            font = tkfont.Font(font=("Consolas", 14))
-            indent_px = font.measure(" " * leading_spaces)
-            indent_tag = f"user_indent_{self.current_line}"
+            indent_tag = self.get_indent_tag(leading_spaces)
             self.text_display.config(state=tk.NORMAL)
-            self.text_display.tag_configure(
-                indent_tag, lmargin1=indent_px, lmargin2=indent_px
-            )
             self.text_display.tag_add(indent_tag, user_line_start, user_line_end)
             self.text_display.config(state=tk.DISABLED)
         except Exception:
             pass
 
-    def apply_syntax_highlighting(self):
-        """문법 하이라이팅 적용"""
+    def get_indent_px(self, leading_spaces):
+        """선행 공백 수에 해당하는 픽셀 폭 (공용 폰트로 폭마다 한 번만 측정)"""
+        indent_px = self.indent_px_cache.get(leading_spaces)
+        if indent_px is None:
+            indent_px = self.text_font.measure(" " * leading_spaces)
+            self.indent_px_cache[leading_spaces] = indent_px
+        return indent_px
+
+    def get_indent_tag(self, leading_spaces):
+        """들여쓰기 폭별 공용 태그 반환 (처음 쓰일 때만 설정)"""
+        indent_tag = f"user_indent_{leading_spaces}"
+        if indent_tag not in self.indent_tags:
+            indent_px = self.get_indent_px(leading_spaces)
+            self.text_display.tag_configure(
+                indent_tag, lmargin1=indent_px, lmargin2=indent_px
+            )
+            self.indent_tags.add(indent_tag)
+        return indent_tag
+
+    def clear_indent_tags(self):
+        """이전 세션의 들여쓰기 태그를 태그 테이블에서 제거"""
+        stale_tags = [
+            name
+            for name in self.text_display.tag_names()
+            if name.startswith("user_indent_")
+        ]
+        if stale_tags:
+            self.text_display.tag_delete(*stale_tags)
+        self.indent_tags = set()
+
+    def apply_syntax_highlighting(self, start=0, end=None):
+        """문법 하이라이팅 적용 (start ~ end-1 원문 줄)"""
         if not self.current_text:
             return
+        if end is None:
+            end = self.viewport_end
+        started = time.perf_counter()
 
         # 태그 설정 - 동일한 폰트 크기(14)로 통일하여 정렬 일관성 보장
         self.text_display.tag_configure(
@@ -1535,225 +3732,37 @@ int main() {
         self.text_display.tag_configure(
             "number", foreground="#FF8000", font=("Consolas", 14)
         )
-        self.text_display.tag_configure(
-            "function", foreground="#800080", font=("Consolas", 14)
-        )
-
-        # 언어별 키워드 정의
-        keywords = self.get_language_keywords()
-
-        # 키워드 하이라이팅
-        for keyword in keywords:
-            start = "1.0"
-            while True:
-                pos = self.text_display.search(
-                    rf"\b{keyword}\b", start, tk.END, regexp=True
-                )
-                if not pos:
-                    break
-                end = f"{pos}+{len(keyword)}c"
-                self.text_display.tag_add("keyword", pos, end)
-                start = end
-
-        # 문자열 하이라이팅
-        string_patterns = [r'"[^"]*"', r"'[^']*'", r"`[^`]*`"]
-        for pattern in string_patterns:
-            start = "1.0"
-            while True:
-                pos = self.text_display.search(pattern, start, tk.END, regexp=True)
-                if not pos:
-                    break
-                end = self.text_display.index(f"{pos} lineend")
-                self.text_display.tag_add("string", pos, end)
-                start = end
-
-        # 주석 하이라이팅
-        comment_patterns = self.get_comment_patterns()
-        for pattern in comment_patterns:
-            start = "1.0"
-            while True:
-                pos = self.text_display.search(pattern, start, tk.END, regexp=True)
-                if not pos:
-                    break
-                end = self.text_display.index(f"{pos} lineend")
-                self.text_display.tag_add("comment", pos, end)
-                start = end
-
-    def get_language_keywords(self):
-        """언어별 키워드 반환"""
-        keyword_map = {
-            "python": [
-                "def",
-                "class",
-                "if",
-                "else",
-                "elif",
-                "for",
-                "while",
-                "import",
-                "from",
-                "return",
-                "try",
-                "except",
-                "finally",
-                "with",
-                "as",
-                "lambda",
-                "yield",
-                "async",
-                "await",
-                "True",
-                "False",
-                "None",
-            ],
-            "java": [
-                "public",
-                "private",
-                "protected",
-                "class",
-                "interface",
-                "extends",
-                "implements",
-                "if",
-                "else",
-                "for",
-                "while",
-                "switch",
-                "case",
-                "break",
-                "continue",
-                "return",
-                "try",
-                "catch",
-                "finally",
-                "throw",
-                "throws",
-                "static",
-                "final",
-                "abstract",
-                "synchronized",
-                "volatile",
-                "transient",
-                "native",
-                "strictfp",
-            ],
-            "javascript": [
-                "function",
-                "var",
-                "let",
-                "const",
-                "if",
-                "else",
-                "for",
-                "while",
-                "do",
-                "switch",
-                "case",
-                "break",
-                "continue",
-                "return",
-                "try",
-                "catch",
-                "finally",
-                "throw",
-                "typeof",
-                "instanceof",
-                "new",
-                "this",
-                "true",
-                "false",
-                "null",
-                "undefined",
-            ],
-            "cpp": [
-                "int",
-                "float",
-                "double",
-                "char",
-                "bool",
-                "void",
-                "if",
-                "else",
-                "for",
-                "while",
-                "do",
-                "switch",
-                "case",
-                "break",
-                "continue",
-                "return",
-                "try",
-                "catch",
-                "throw",
-                "class",
-                "struct",
-                "public",
-                "private",
-                "protected",
-                "virtual",
-                "static",
-                "const",
-                "volatile",
-                "extern",
-                "inline",
-                "template",
-                "namespace",
-                "using",
-                "new",
-                "delete",
-            ],
-            "react": [
-                "import",
-                "export",
-                "default",
-                "function",
-                "const",
-                "let",
-                "var",
-                "if",
-                "else",
-                "for",
-                "while",
-                "do",
-                "switch",
-                "case",
-                "break",
-                "continue",
-                "return",
-                "try",
-                "catch",
-                "finally",
-                "throw",
-                "typeof",
-                "instanceof",
-                "new",
-                "this",
-                "true",
-                "false",
-                "null",
-                "undefined",
-                "useState",
-                "useEffect",
-                "useContext",
-                "useReducer",
-                "useMemo",
-                "useCallback",
-                "React",
-                "Component",
-            ],
-        }
-        return keyword_map.get(self.current_language, [])
-
-    def get_comment_patterns(self):
-        """언어별 주석 패턴 반환"""
-        comment_map = {
-            "python": [r"#.*"],
-            "java": [r"//.*", r"/\*.*?\*/"],
-            "javascript": [r"//.*", r"/\*.*?\*/"],
-            "cpp": [r"//.*", r"/\*.*?\*/"],
-            "react": [r"//.*", r"/\*.*?\*/", r"\{/\*.*?\*/\}"],
-        }
-        return comment_map.get(self.current_language, [])
+        self.text_display.tag_configure(
+            "function", foreground="#800080", font=("Consolas", 14)
+        )
+
+        # 한 번의 스캔으로 계산한 구간을 태그별로 모아 일괄 적용
+        if self.syntax_line_spans is None:
+            self.syntax_line_spans = self.get_syntax_spans()
+        ranges_by_tag = {}
+        for i in range(start, end):
+            row = self.original_row(i)
+            for tag, start_col, end_col in self.syntax_line_spans[i]:
+                ranges_by_tag.setdefault(tag, []).extend(
+                    (f"{row}.{start_col}", f"{row}.{end_col}")
+                )
+
+        # Tcl 명령 길이가 과도해지지 않도록 일정 개수씩 나누어 적용
+        chunk = SYNTAX_TAG_BATCH_SIZE * 2
+        for tag, indices in ranges_by_tag.items():
+            for i in range(0, len(indices), chunk):
+                self.text_display.tag_add(tag, *indices[i : i + chunk])
+        self.syntax_time += time.perf_counter() - started
+
+    def get_syntax_spans(self):
+        """현재 텍스트의 하이라이팅 구간 반환 (캐시에 있으면 재계산하지 않음)"""
+        line_spans = self.highlight_cache.get(self.current_language, self.current_text)
+        if line_spans is None:
+            line_spans = self.syntax_tokenizer.spans(self.text_lines, self.current_language)
+            self.highlight_cache.put(
+                self.current_language, self.current_text, line_spans
+            )
+        return line_spans
 
     def highlight_text(self):
         """입력한 부분 하이라이트"""
@@ -1786,23 +3795,32 @@ int main() {
 
     def on_key_press(self, event):
         """키 입력 처리 (한컴타자연습 스타일)"""
+        arrived = time.perf_counter()
+        # 재생 중에는 Esc 로 중지만 가능
+        if self.replay is not None:
+            if event.keysym == "Escape":
+                self.stop_replay()
+            return "break"
+        # 재생이 끝난 텍스트에는 입력하지 않음 (새 연습을 시작하면 점수를 매기는 새 세션이 됨)
+        if not self.session.scoring:
+            return "break"
         if not self.is_typing and len(self.text_lines) > 0:
             self.start_time = time.time()
             self.is_typing = True
             self.start_timer()
+            self.start_ghost()
 
         # Enter 키 처리
         if event.keysym == "Return":
-            if self.current_line < len(
-                self.text_lines
-            ) and self.current_char_in_line >= len(self.text_lines[self.current_line]):
-                # 현재 줄 완료, 다음 줄로
-                self.move_to_next_line()
+            # 현재 줄을 끝까지 입력했으면 다음 줄로
+            self.session.enter()
+            self.note_key_arrival(arrived)
             return "break"
 
         # Backspace 처리
         if event.keysym == "BackSpace":
             self.handle_backspace()
+            self.note_key_arrival(arrived)
             return "break"
 
         # 일반 문자 입력 (Shift 조합은 event.char에 이미 반영됨)
@@ -1813,102 +3831,44 @@ int main() {
         ):
             # event.char에 이미 Shift 조합이 반영되어 있음
             # 예: Shift+Q -> "Q", Shift+1 -> "!", Shift+, -> "<"
-            dvorak_char = self.get_dvorak_char(event.char)
-            self.highlight_dvorak_key(dvorak_char)
+            # 키보드 하이라이트는 다음 프레임에 마지막 키만 반영
+            self.pending_key_char = self.get_dvorak_char(event.char)
+            self.schedule_render("key")
             self.handle_char_input(event.char)
+            self.note_key_arrival(arrived)
             return "break"
 
         return None
 
     def handle_char_input(self, char):
-        """문자 입력 처리 (드보락 키보드 지원)"""
-        if self.current_line >= len(self.text_lines):
-            return
-
-        # 드보락 키보드 매핑 적용
-        dvorak_char = self.get_dvorak_char(char)
-
-        current_line_text = self.text_lines[self.current_line]
-
-        # 현재 줄이 가득 찼으면 자동 개행 후 시각적 피드백(깜빡임)
-        if self.current_char_in_line >= len(current_line_text):
-            prev_line = self.current_line
-            self.move_to_next_line()
-            # 모든 줄을 마친 경우 종료
-            if self.current_line == prev_line:
-                return
-            self.flash_current_input_line()
-            current_line_text = self.text_lines[self.current_line]
-
-        # 현재 줄 길이를 초과하면 더 이상 입력하지 않음
-        if self.current_char_in_line >= len(current_line_text):
-            self.move_to_next_line()
-            self.flash_current_input_line()
-            # 새 줄의 자동 들여쓰기 적용
-            self.apply_auto_indent_for_current_line()
-            return
-
-        if self.current_char_in_line < len(current_line_text):
-            expected_char = current_line_text[self.current_char_in_line]
-
-            # 사용자 입력 줄 업데이트 (드보락 문자로)
-            self.user_lines[self.current_line] += dvorak_char
-
-            # 텍스트 위젯 업데이트
-            self.update_user_line()
-
-            if dvorak_char == expected_char:
-                self.correct_chars += 1
-                self.total_chars += 1
-                self.current_char_in_line += 1
-            else:
-                # 잘못된 입력 (빨간색 표시)
-                self.total_chars += 1
-                self.current_char_in_line += 1
-
-            self.update_stats()
-            self.update_progress_bar()
-
-            # 줄 완료 체크: 자동으로 다음 줄 이동 및 자동 스크롤
-            if self.current_char_in_line >= len(current_line_text):
-                self.move_to_next_line()
-                self.flash_current_input_line()
-                # 새 줄의 자동 들여쓰기 적용
-                self.apply_auto_indent_for_current_line()
+        """문자 입력 처리 (드보락 키보드 매핑 후 세션 엔진에 전달)"""
+        self.session.feed_char(self.get_dvorak_char(char))
 
     def handle_backspace(self):
         """백스페이스 처리"""
-        if self.current_char_in_line > 0:
-            self.current_char_in_line -= 1
-            if len(self.user_lines[self.current_line]) > 0:
-                self.user_lines[self.current_line] = self.user_lines[self.current_line][
-                    :-1
-                ]
-                self.update_user_line()
-                self.update_stats()
-                self.update_progress_bar()
-
-    def move_to_next_line(self):
-        """다음 줄로 이동"""
-        if self.current_line < len(self.text_lines) - 1:
-            self.current_line += 1
-            self.current_char_in_line = 0
-            self.update_stats()
-            self.update_progress_bar()
-            # 새 줄 시작 위치로 자동 스크롤 및 현재 위치 하이라이트
-            user_line_num = self.current_line * 2 + 2
-            pos = f"{user_line_num}.0"
-            self.text_display.see(pos)
-            # 자동 들여쓰기 적용
-            self.apply_auto_indent_for_current_line()
-        else:
-            # 모든 줄 완료
-            self.check_completion()
+        self.session.backspace()
+
+    def on_session_event(self, kind, line_index):
+        """세션 엔진의 변화 알림을 위젯 갱신 예약으로 변환"""
+        if kind == "char":
+            # 텍스트 위젯과 통계는 다음 프레임에 한 번에 갱신
+            self.schedule_render("stats", "progress", line=line_index)
+        elif kind == "advance":
+            # 창 이동(완료된 줄 제거/앞쪽 줄 추가), 새 줄로 스크롤, 통계 갱신
+            self.schedule_render("viewport", "stats", "progress", line=line_index)
+        elif kind == "indent":
+            self.schedule_render("indent", line=line_index)
+        elif kind == "flash":
+            self.schedule_render("flash")
+        elif kind == "complete":
+            # 모든 줄 완료 (재생 중이면 기록하지 않음)
+            if self.replay is None:
+                self.check_completion()
 
     def flash_current_input_line(self):
         """현재 입력 줄을 짧게 깜빡여 개행을 알림"""
         if self.current_line < len(self.text_lines):
-            user_line_num = self.current_line * 2 + 2
+            user_line_num = self.user_row(self.current_line)
             start = f"{user_line_num}.0"
             end = f"{user_line_num}.end"
             self.text_display.config(state=tk.NORMAL)
@@ -1917,61 +3877,69 @@ int main() {
             self.text_display.tag_add("line_flash", start, end)
             self.text_display.config(state=tk.DISABLED)
 
-            # 150ms 후 원상복구
+            # 150ms 후 원상복구 (그 사이 창이 이동했을 수 있으므로 전체에서 제거)
             def _clear_flash():
                 self.text_display.config(state=tk.NORMAL)
-                self.text_display.tag_remove("line_flash", start, end)
+                self.text_display.tag_remove("line_flash", "1.0", tk.END)
                 self.text_display.config(state=tk.DISABLED)
 
             self.root.after(150, _clear_flash)
 
-    def update_user_line(self):
-        """사용자 입력 줄 업데이트"""
-        if self.current_line < len(self.text_lines):
-            user_line_num = self.current_line * 2 + 2  # 사용자 입력 줄 번호
-            user_line_start = f"{user_line_num}.0"
-            user_line_end = f"{user_line_num}.end"
-
-            # 기존 태그 제거
-            self.text_display.tag_remove("correct", user_line_start, user_line_end)
-            self.text_display.tag_remove("incorrect", user_line_start, user_line_end)
-            self.text_display.tag_remove("current", user_line_start, user_line_end)
-
-            # 사용자 입력 텍스트 업데이트
-            self.text_display.config(state=tk.NORMAL)
-            self.text_display.delete(user_line_start, user_line_end)
-            self.text_display.insert(
-                user_line_start, self.user_lines[self.current_line]
-            )
-
-            # 정오 표기 적용
-            current_line_text = self.text_lines[self.current_line]
-            user_input = self.user_lines[self.current_line]
+    def update_user_line(self, line_index=None):
+        """사용자 입력 줄 업데이트 (이전 렌더링과 달라진 부분만 반영)"""
+        if line_index is None:
+            line_index = self.current_line
+        if line_index < len(self.text_lines):
+            user_line_num = self.user_row(line_index)  # 사용자 입력 줄 번호
+            current_line_text = self.text_lines[line_index]
+            user_input = self.user_lines[line_index]
             # 라인 길이를 초과해 그려지지 않도록 사용자 입력을 제한해서 표시
             if len(user_input) > len(current_line_text):
                 user_input = user_input[: len(current_line_text)]
 
-            # 아래줄과 위줄의 좌우 간격을 맞추기 위해, 문자폭이 고정이 아닌 경우에도
-            # 문자 단위로 동일 위치에 태그를 적용한다
-            for i, (expected, actual) in enumerate(zip(current_line_text, user_input)):
-                char_start = f"{user_line_num}.{i}"
-                char_end = f"{user_line_num}.{i+1}"
+            # 위젯에 이미 그려진 내용과의 공통 접두사 길이 계산
+            rendered = self.rendered_user_lines[line_index]
+            if user_input.startswith(rendered):
+                prefix = len(rendered)
+            elif rendered.startswith(user_input):
+                prefix = len(user_input)
+            else:
+                prefix = 0
+                limit = min(len(rendered), len(user_input))
+                while prefix < limit and rendered[prefix] == user_input[prefix]:
+                    prefix += 1
 
-                if expected == actual:
-                    self.text_display.tag_add("correct", char_start, char_end)
-                else:
-                    self.text_display.tag_add("incorrect", char_start, char_end)
+            self.text_display.config(state=tk.NORMAL)
+
+            # 달라진 꼬리 부분만 삭제 (삭제된 문자의 태그도 함께 사라짐)
+            if prefix < len(rendered):
+                self.text_display.delete(
+                    f"{user_line_num}.{prefix}", f"{user_line_num}.{len(rendered)}"
+                )
+
+            # 새로 입력된 부분만 삽입하고 정오 표기 (연속 구간당 태그 범위 하나)
+            runs = self.line_runs[line_index]
+            runs.truncate(prefix)
+            if prefix < len(user_input):
+                self.text_display.insert(
+                    f"{user_line_num}.{prefix}", user_input[prefix:]
+                )
+                for i in range(prefix, len(user_input)):
+                    runs.append(current_line_text[i] == user_input[i])
+                for tag, run_start, run_end in runs.ranges_from(prefix):
+                    self.text_display.tag_add(
+                        tag, f"{user_line_num}.{run_start}", f"{user_line_num}.{run_end}"
+                    )
 
-            # 부족한 영역(아직 입력하지 않은 위치)은 원문과 간격을 맞추기 위해 공백 태그를 적용
-            remaining = len(current_line_text) - len(user_input)
-            if remaining > 0:
-                pad_start = f"{user_line_num}.{len(user_input)}"
-                pad_end = f"{user_line_num}.{len(current_line_text)}"
-                # 패딩은 아무 색도 칠하지 않지만 caret 위치 보정에 도움이 됨
-                self.text_display.tag_add("user_input", pad_start, pad_end)
+            self.rendered_user_lines[line_index] = user_input
 
             # 현재 위치 표시 (더 명확하게)
-            if self.current_char_in_line <= len(current_line_text):
+            self.text_display.tag_remove(
+                "current", f"{user_line_num}.0", f"{user_line_num}.end"
+            )
+            if line_index == self.current_line and self.current_char_in_line <= len(
+                current_line_text
+            ):
                 current_pos_start = f"{user_line_num}.{self.current_char_in_line}"
                 current_pos_end = f"{user_line_num}.{self.current_char_in_line + 1}"
                 self.text_display.tag_add("current", current_pos_start, current_pos_end)
@@ -1988,6 +3956,83 @@ int main() {
 
             self.text_display.config(state=tk.DISABLED)
 
+    def schedule_render(self, *parts, line=None):
+        """위젯 갱신 예약 (입력이 몰려도 프레임당 한 번으로 합쳐서 반영)
+
+        parts: "stats", "progress", "viewport", "indent", "flash", "key"
+        line: 다시 그려야 할 사용자 입력 줄 번호
+        """
+        if line is not None:
+            self.dirty_lines.add(line)
+        self.dirty_parts.update(parts)
+        if self.render_job is None:
+            elapsed_ms = (time.perf_counter() - self.last_flush_time) * 1000
+            delay = int(self.frame_budget_ms - elapsed_ms)
+            if delay > 0:
+                self.render_job = self.root.after(delay, self.flush_render)
+            else:
+                self.render_job = self.root.after_idle(self.flush_render)
+
+    def cancel_pending_render(self):
+        """예약된 위젯 갱신 취소"""
+        if self.render_job is not None:
+            self.root.after_cancel(self.render_job)
+            self.render_job = None
+        self.dirty_lines = set()
+        self.dirty_parts = set()
+        self.pending_key_times = []
+
+    def note_key_arrival(self, arrived):
+        """지연 진단용 키 도착 시각 기록 (화면 갱신이 예약된 키만)"""
+        if self.latency_recorder is not None and self.render_job is not None:
+            self.pending_key_times.append(arrived)
+
+    def flush_render(self):
+        """예약된 위젯 갱신을 한 번에 반영"""
+        flush_started = time.perf_counter()
+        self.syntax_time = 0.0
+        if self.render_job is not None:
+            self.root.after_cancel(self.render_job)
+            self.render_job = None
+        parts, self.dirty_parts = self.dirty_parts, set()
+        lines, self.dirty_lines = self.dirty_lines, set()
+
+        # 창 이동이 먼저 일어나야 새 줄이 위젯에 존재함
+        if "viewport" in parts:
+            self.update_viewport()
+        if "indent" in parts:
+            self.apply_indent_tag(self.current_line)
+        # 이전 줄의 마지막 글자까지 그린 뒤 현재 줄을 마지막에 그림
+        lines_started = time.perf_counter()
+        for line_index in sorted(lines):
+            if self.viewport_start <= line_index < self.viewport_end:
+                self.update_user_line(line_index)
+        lines_ended = time.perf_counter()
+        if "flash" in parts:
+            self.flash_current_input_line()
+        if "key" in parts and self.pending_key_char is not None:
+            self.highlight_dvorak_key(self.pending_key_char)
+            self.pending_key_char = None
+        stats_started = time.perf_counter()
+        if "stats" in parts:
+            self.update_stats()
+        progress_started = time.perf_counter()
+        if "progress" in parts:
+            self.update_progress_bar()
+        self.last_flush_time = time.perf_counter()
+
+        if self.latency_recorder is not None and self.pending_key_times:
+            sections = (
+                self.syntax_time * 1000,
+                (lines_ended - lines_started) * 1000,
+                (progress_started - stats_started) * 1000,
+                (self.last_flush_time - progress_started) * 1000,
+            )
+            self.latency_recorder.record_frame(
+                self.pending_key_times, flush_started, self.last_flush_time, sections
+            )
+            self.pending_key_times = []
+
     def on_key_release(self, event):
         """키 릴리스 처리"""
         pass
@@ -2046,19 +4091,9 @@ int main() {
                         self.live_acc_label.config(text="0%")
 
     def update_progress_bar(self):
-        """진행률 바 업데이트"""
+        """진행률 바 업데이트 (세션 엔진이 증분 유지하는 값 사용, 상수 시간)"""
         if len(self.text_lines) > 0:
-            # 전체 문자 수 계산
-            total_chars = sum(len(line) for line in self.text_lines)
-            completed_chars = sum(
-                len(self.user_lines[i]) for i in range(len(self.user_lines))
-            )
-
-            # 현재 줄의 진행 상황도 포함
-            if self.current_line < len(self.text_lines):
-                completed_chars += self.current_char_in_line
-
-            progress = (completed_chars / total_chars) * 100 if total_chars > 0 else 0
+            progress = self.session.progress()
 
             # 진행률 바 업데이트
             progress_width = int((progress / 100) * 300)  # 300픽셀 기준
@@ -2070,11 +4105,21 @@ int main() {
     def check_completion(self):
         """완료 체크"""
         # 모든 줄이 완료되었는지 검사: 마지막 줄의 마지막 문자까지 입력되었을 때 완료 처리
-        all_done = self.current_line == len(
-            self.text_lines
-        ) - 1 and self.current_char_in_line >= len(self.text_lines[-1])
+        all_done = self.session.is_complete()
+        if all_done and not self.session.scoring:
+            # 재생했던 세션(재생이 끝난 뒤 이어서 입력한 경우 포함)은 기록하지 않음
+            self.is_typing = False
+            return
         if all_done:
+            # 마지막 입력이 화면에 반영된 뒤 결과 표시
+            self.flush_render()
             self.is_typing = False
+            self.stop_ghost()
+            # 연습 모드 세션도 설정 창에서 다시 볼 수 있도록 보관
+            self.last_replay_source = (self.keystroke_log_header(), self.session.log)
+            # 점수 기록 여부와 관계없이 끝난 세션의 키 입력을 키/바이그램 통계에 더함
+            self.key_stats.merge_log(self.session.log)
+            self.persist(self.key_stats)
             final_time = time.time() - self.start_time if self.start_time else 0
 
             # 최종 통계 계산
@@ -2199,6 +4244,17 @@ int main() {
             else:
                 # 연습 모드: 점수 기록 없이 간단한 완료 메시지만 표시
                 message = f"연습 완료!\n\n타이핑 속도: {final_wpm:.1f} WPM\n정확도: {final_accuracy:.1f}%\n시간: {final_time:.1f}초\n\n(연습 모드: 점수 기록 없음)"
+                # 단계별 키 연습: 기준을 넘으면 다음 글자 해제
+                if self.practice_text_generator == self.generate_unlock_drill:
+                    unlocked = self.unlock_progress.record_drill(
+                        final_wpm, final_accuracy
+                    )
+                    if unlocked:
+                        self.persist(self.unlock_progress)
+                        message += f"\n\n🔓 새 글자 해제: {unlocked}"
+                        self.update_unlock_label()
+                    elif self.unlock_progress.unlocked < len(self.unlock_progress.order):
+                        message += f"\n\n다음 글자 해제 기준: 정확도 {UNLOCK_MIN_ACCURACY}% 이상, {UNLOCK_MIN_WPM} WPM 이상"
                 try:
                     messagebox.showinfo("연습 완료", message)
                 except Exception:
@@ -2208,17 +4264,18 @@ int main() {
 
     def reset_practice(self):
         """연습 리셋"""
+        self.stop_replay()
+        self.stop_ghost()
         self.user_input = ""
-        self.user_lines = []
         self.start_time = None
         self.is_typing = False
         self.current_position = 0
-        self.current_line = 0
-        self.current_char_in_line = 0
-        self.correct_chars = 0
-        self.total_chars = 0
         self.timer_running = False
 
+        # 새 세션 엔진 (진행 상태 초기화)
+        self.session = TypingSession(self.current_text)
+        self.session.subscribe(self.on_session_event)
+
         # 통계 초기화
         self.speed_label.config(text="0타/분")
         self.accuracy_label.config(text="0%")
@@ -2228,15 +4285,221 @@ int main() {
         # 진행률 바 초기화
         self.progress_bar.config(width=0)
 
-        # 텍스트 재표시
+        # 텍스트 재표시 (렌더링은 여기서 한 번만)
         if self.current_text:
             self.display_text()
-            # 키보드 이벤트 다시 바인딩
-            self.text_display.bind("<KeyPress>", self.on_key_press)
-            self.text_display.bind(
-                "<Button-1>", lambda e: self.text_display.focus_set()
+            self.load_ghost()
+
+    def start_replay(self, header, log, speed=1):
+        """키 입력 기록을 text_display 에 재생 (speed 가 None 이면 즉시)"""
+        self.stop_replay()
+        saved_mode = (self.is_coding_mode, self.current_language)
+        # 기록된 세션과 같은 모드/언어로 표시
+        self.is_coding_mode = header.get("mode") == "coding"
+        if header.get("language"):
+            self.current_language = header["language"]
+        # 언어 선택 화면에서 점수판을 열어 재생해도 보이도록 타자 화면으로 전환
+        self.show_typing_view()
+        self.start_session(header["text"])
+
+        self.session.scoring = False
+        self.replay = SessionReplay(self.session, log, speed)
+        self.replay_saved_mode = saved_mode
+        self.replay_started = time.perf_counter()
+        self.start_time = time.time()
+        self.replay_tick()
+
+    def replay_tick(self):
+        """한 프레임 동안 도달한 키 입력을 모아서 재생하고 한 번에 그림"""
+        self.replay_job = None
+        replay = self.replay
+        if replay is None:
+            return
+        if replay.speed is None:
+            replay.feed_all()
+        else:
+            elapsed_ms = (time.perf_counter() - self.replay_started) * 1000
+            replay.feed_until(elapsed_ms * replay.speed)
+        self.flush_render()
+
+        if replay.done:
+            self.stop_replay()
+        else:
+            self.replay_job = self.root.after(
+                self.frame_budget_ms or FRAME_BUDGET_MS, self.replay_tick
+            )
+
+    def stop_replay(self):
+        """재생 중지 (화면은 그대로 두고 원래 모드 복원, 재생한 텍스트는 새 연습을 시작할 때까지 입력 안 받음)"""
+        if self.replay is None:
+            return
+        if self.replay_job is not None:
+            self.root.after_cancel(self.replay_job)
+            self.replay_job = None
+        self.is_coding_mode, self.current_language = self.replay_saved_mode
+        self.replay = None
+
+    def replay_session_entry(self, session, speed, window=None):
+        """통계에 저장된 세션의 키 입력 기록 재생"""
+        relative_path = session.get("keystroke_log")
+        if not relative_path:
+            messagebox.showinfo("알림", "키 입력 기록이 없는 세션입니다.")
+            return
+        try:
+            header, log = self.load_keystroke_log(relative_path)
+        except (OSError, ValueError, KeyError) as e:
+            messagebox.showerror("오류", f"키 입력 기록을 읽을 수 없습니다: {str(e)}")
+            return
+        if window is not None:
+            window.destroy()
+        self.start_replay(header, log, speed)
+
+    def replay_last_session(self, speed, window=None):
+        """마지막으로 끝낸 세션 재생 (없으면 기록이 있는 가장 최근 세션)"""
+        if self.last_replay_source is not None:
+            if window is not None:
+                window.destroy()
+            header, log = self.last_replay_source
+            self.start_replay(header, log, speed)
+            return
+        for session in reversed(self.stats_data.get("sessions", [])):
+            if session.get("keystroke_log"):
+                self.replay_session_entry(session, speed, window)
+                return
+        messagebox.showinfo("알림", "재생할 세션이 없습니다.")
+
+    def find_best_run(self, text, sessions):
+        """같은 텍스트에서 점수가 가장 높은, 키 입력 기록이 있는 세션 (저장 스레드에서 호출)"""
+        digest = text_hash(text)
+        if self.session_store:
+            result = self.session_store.best_run(
+                digest, sessions, self.session_store.connection
+            )
+            if result is not False:
+                return result
+        best = None
+        for session in sessions:
+            if session.get("text_hash") != digest or not session.get("keystroke_log"):
+                continue
+            if best is None or session.get("score", 0) > best.get("score", 0):
+                best = session
+        return best
+
+    def load_ghost(self):
+        """고스트 레이스가 켜져 있으면 현재 텍스트의 최고 기록을 저장 스레드에서 불러옴
+
+        DB 조회와 기록 파일 읽기는 UI 스레드를 막지 않는다. 결과는 요청 번호와 함께
+        ghost_result 에 놓이고, UI 스레드가 take_ghost() 로 가져간다.
+        """
+        self.ghost = None
+        self.ghost_request += 1
+        self.ghost_loading = False
+        if not self.ghost_enabled or not self.current_text:
+            return
+        request = self.ghost_request
+        text = self.current_text
+        sessions = self.stats_data["sessions"]
+
+        def load():
+            ghost = None
+            try:
+                best = self.find_best_run(text, sessions)
+                if best is not None:
+                    _, log = self.load_keystroke_log(best["keystroke_log"])
+                    # 키 입력이 하나도 없는 기록은 고스트 없음으로 취급 (첫 키에 틱을 예약하지 않음)
+                    if len(log):
+                        ghost = GhostRun(text, log)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"고스트 기록 로드 오류: {e}")
+            # 속성 하나를 통째로 바꾸므로 UI 스레드는 항상 완성된 결과만 봄
+            self.ghost_result = (request, ghost)
+
+        self.ghost_loading = True
+        self.persistence.submit(load)
+
+    def take_ghost(self):
+        """불러온 고스트를 가져옴 (아직 불러오는 중이면 False)"""
+        if self.ghost_loading:
+            result = self.ghost_result
+            if result is None or result[0] != self.ghost_request:
+                return False
+            self.ghost = result[1]
+            self.ghost_loading = False
+        return True
+
+    def start_ghost(self):
+        """첫 키 입력과 함께 고스트 출발 (아직 불러오는 중이면 도착할 때까지 프레임마다 확인)"""
+        if self.take_ghost() and self.ghost is None:
+            return
+        self.ghost_started = time.perf_counter()
+        self.ghost_tick()
+
+    def ghost_tick(self):
+        """프레임마다 경과 시간으로 고스트 위치를 구해 표시"""
+        self.ghost_job = None
+        if not self.is_typing:
+            self.clear_ghost_mark()
+            return
+        if not self.take_ghost():
+            self.ghost_job = self.root.after(
+                self.frame_budget_ms or FRAME_BUDGET_MS, self.ghost_tick
+            )
+            return
+        if self.ghost is None:
+            self.clear_ghost_mark()
+            return
+        elapsed_ms = (time.perf_counter() - self.ghost_started) * 1000
+        self.draw_ghost(*self.ghost.position_at(elapsed_ms))
+        # 고스트가 끝까지 간 뒤에는 마지막 위치에 멈춰 있음
+        if elapsed_ms <= self.ghost.duration_ms:
+            self.ghost_job = self.root.after(
+                self.frame_budget_ms or FRAME_BUDGET_MS, self.ghost_tick
             )
-            self.text_display.focus_set()
+
+    def draw_ghost(self, line_index, column):
+        """고스트 표시를 원문 줄의 해당 열로 이동 (위치가 바뀔 때만 갱신)"""
+        if self.ghost_mark == (line_index, column):
+            return
+        self.clear_ghost_mark()
+        if self.viewport_start <= line_index < self.viewport_end:
+            # 줄 끝(열 = 줄 길이)에서는 줄바꿈 문자 대신 마지막 글자에 표시, 빈 줄은 표시 안 함
+            last_column = len(self.text_lines[line_index]) - 1
+            if last_column >= 0:
+                row = self.original_row(line_index)
+                column_shown = min(column, last_column)
+                self.text_display.tag_add(
+                    "ghost", f"{row}.{column_shown}", f"{row}.{column_shown + 1}"
+                )
+            self.ghost_mark = (line_index, column)
+
+    def clear_ghost_mark(self):
+        if self.ghost_mark is not None:
+            self.text_display.tag_remove("ghost", "1.0", tk.END)
+            self.ghost_mark = None
+
+    def stop_ghost(self):
+        """고스트 중지 및 표시 제거"""
+        if self.ghost_job is not None:
+            self.root.after_cancel(self.ghost_job)
+            self.ghost_job = None
+        self.clear_ghost_mark()
+
+    def toggle_ghost_race(self, button=None):
+        """고스트 레이스 켜기/끄기 (다음 키 입력부터 적용)"""
+        self.ghost_enabled = not self.ghost_enabled
+        if self.ghost_enabled:
+            if not self.is_typing:
+                self.load_ghost()
+        else:
+            self.stop_ghost()
+            self.ghost = None
+            self.ghost_request += 1
+            self.ghost_loading = False
+        if button is not None:
+            button.config(text=self.ghost_race_button_text())
+
+    def ghost_race_button_text(self):
+        return f"고스트 레이스: {'켜짐' if self.ghost_enabled else '꺼짐'}"
 
     def load_text_from_file(self):
         """파일에서 텍스트 로드"""
@@ -2248,10 +4511,9 @@ int main() {
         if file_path:
             try:
                 with open(file_path, "r", encoding="utf-8") as file:
-                    self.current_text = file.read().strip()
-                    if self.current_text:
-                        self.display_text()
-                        self.reset_practice()
+                    text = file.read().strip()
+                    if text:
+                        self.start_session(text)
                         # status_label 제거됨
                     else:
                         messagebox.showerror("오류", "파일이 비어있습니다.")
@@ -2273,12 +4535,19 @@ int main() {
             font=("맑은 고딕", 16, "bold"),
         ).pack(pady=20)
 
-        # 난이도별 텍스트
+        # 난이도별 텍스트 (practice_texts.txt 가 있으면 그 문장 중에서 선택)
         difficulties = {
             "초급": "The cat sat on the mat. The dog ran in the yard.",
             "중급": "Practice typing with the Dvorak keyboard layout for improved efficiency.",
             "고급": "The Dvorak Simplified Keyboard was designed to increase typing speed and reduce finger fatigue through optimized key placement.",
         }
+        for level, sentences in self.load_practice_texts().items():
+            if level in difficulties and sentences:
+                if level == "초급":
+                    picked = random.sample(sentences, min(2, len(sentences)))
+                    difficulties[level] = " ".join(picked)
+                else:
+                    difficulties[level] = random.choice(sentences)
 
         for level, text in difficulties.items():
             btn = tk.Button(
@@ -2389,11 +4658,9 @@ int main() {
                 ):
                     templates = self.coding_templates[language][difficulty]
                     if template_index < len(templates):
-                        self.current_text = templates[template_index]
                         self.current_language = language
                         self.current_difficulty = difficulty
-                        self.display_text()
-                        self.reset_practice()
+                        self.start_session(templates[template_index])
                         # status_label 제거됨
                         template_window.destroy()
 
@@ -2418,9 +4685,7 @@ int main() {
 
     def set_difficulty_text(self, text, window):
         """난이도 텍스트 설정"""
-        self.current_text = text
-        self.display_text()
-        self.reset_practice()
+        self.start_session(text)
         # status_label 제거됨
         window.destroy()
 
@@ -2437,103 +4702,47 @@ int main() {
         # 통계 데이터 포맷팅
         stats_content = "=== 타이핑 & 코딩 연습 통계 ===\n\n"
 
-        if hasattr(self, "stats_data") and self.stats_data:
-            total_sessions = len(self.stats_data["sessions"])
-            typing_sessions = [
-                s for s in self.stats_data["sessions"] if s.get("mode") == "typing"
-            ]
-            coding_sessions = [
-                s for s in self.stats_data["sessions"] if s.get("mode") == "coding"
-            ]
-
-            # 전체 통계
-            avg_wpm = (
-                sum(s["wpm"] for s in self.stats_data["sessions"]) / total_sessions
-            )
-            avg_accuracy = (
-                sum(s["accuracy"] for s in self.stats_data["sessions"]) / total_sessions
-            )
+        # 전체/모드별/언어별 집계 (세션 목록을 훑지 않고 누적값에서 계산)
+        summary = self.stats_summary()
+        overall = summary["all"]
 
-            # 전체 평균 점수 계산
-            avg_score = (
-                sum(s.get("score", 0) for s in self.stats_data["sessions"])
-                / total_sessions
-                if all("score" in s for s in self.stats_data["sessions"])
-                else 0
-            )
-            # 최고 점수
-            max_score = (
-                max(s.get("score", 0) for s in self.stats_data["sessions"])
-                if self.stats_data["sessions"]
-                else 0
-            )
+        if overall:
+            typing_summary = summary["modes"].get("typing")
+            coding_summary = summary["modes"].get("coding")
 
-            stats_content += f"총 연습 세션: {total_sessions}회\n"
-            stats_content += f"  - 일반 타자연습: {len(typing_sessions)}회\n"
-            stats_content += f"  - 코딩 연습: {len(coding_sessions)}회\n"
-            stats_content += f"전체 평균 속도: {avg_wpm:.1f} WPM\n"
-            stats_content += f"전체 평균 정확도: {avg_accuracy:.1f}%\n"
-            stats_content += f"전체 평균 점수: {avg_score:.2f}점\n"
-            stats_content += f"최고 점수: {max_score:.2f}점\n\n"
+            stats_content += f"총 연습 세션: {overall['count']}회\n"
+            stats_content += f"  - 일반 타자연습: {typing_summary['count'] if typing_summary else 0}회\n"
+            stats_content += f"  - 코딩 연습: {coding_summary['count'] if coding_summary else 0}회\n"
+            stats_content += f"전체 평균 속도: {overall['wpm']:.1f} WPM (표준편차 {overall['wpm_std']:.1f})\n"
+            stats_content += f"전체 평균 정확도: {overall['accuracy']:.1f}% (표준편차 {overall['accuracy_std']:.1f})\n"
+            stats_content += f"전체 평균 점수: {overall['score']:.2f}점\n"
+            stats_content += f"최고 점수: {overall['max_score']:.2f}점\n"
+            # 최근 추세: 최근 세션에 가중치를 둔 평균 속도와 전체 평균의 차이
+            stats_content += f"최근 추세: {overall['recent_wpm']:.1f} WPM (전체 평균 대비 {overall['recent_wpm'] - overall['wpm']:+.1f})\n\n"
 
             # 일반 타자연습 통계
-            if typing_sessions:
-                typing_avg_wpm = sum(s["wpm"] for s in typing_sessions) / len(
-                    typing_sessions
-                )
-                typing_avg_accuracy = sum(s["accuracy"] for s in typing_sessions) / len(
-                    typing_sessions
-                )
-                typing_avg_score = (
-                    sum(s.get("score", 0) for s in typing_sessions)
-                    / len(typing_sessions)
-                    if all("score" in s for s in typing_sessions)
-                    else 0
-                )
-                stats_content += f"일반 타자연습 평균: {typing_avg_wpm:.1f} WPM, {typing_avg_accuracy:.1f}%, 점수: {typing_avg_score:.2f}점\n"
+            if typing_summary:
+                stats_content += f"일반 타자연습 평균: {typing_summary['wpm']:.1f} WPM, {typing_summary['accuracy']:.1f}%, 점수: {typing_summary['score']:.2f}점 (최근 {typing_summary['recent_wpm']:.1f} WPM)\n"
 
             # 코딩 연습 통계
-            if coding_sessions:
-                coding_avg_wpm = sum(s["wpm"] for s in coding_sessions) / len(
-                    coding_sessions
-                )
-                coding_avg_accuracy = sum(s["accuracy"] for s in coding_sessions) / len(
-                    coding_sessions
-                )
-                coding_avg_score = (
-                    sum(s.get("score", 0) for s in coding_sessions)
-                    / len(coding_sessions)
-                    if all("score" in s for s in coding_sessions)
-                    else 0
-                )
-                stats_content += f"코딩 연습 평균: {coding_avg_wpm:.1f} WPM, {coding_avg_accuracy:.1f}%, 점수: {coding_avg_score:.2f}점\n"
+            if coding_summary:
+                stats_content += f"코딩 연습 평균: {coding_summary['wpm']:.1f} WPM, {coding_summary['accuracy']:.1f}%, 점수: {coding_summary['score']:.2f}점 (최근 {coding_summary['recent_wpm']:.1f} WPM)\n"
 
                 # 언어별 통계
-                languages = {}
-                for session in coding_sessions:
-                    lang = session.get("language", "unknown")
-                    if lang not in languages:
-                        languages[lang] = []
-                    languages[lang].append(session)
-
-                if languages:
+                if summary["languages"]:
                     stats_content += "\n언어별 통계:\n"
-                    for lang, sessions in languages.items():
-                        lang_avg_wpm = sum(s["wpm"] for s in sessions) / len(sessions)
-                        lang_avg_accuracy = sum(s["accuracy"] for s in sessions) / len(
-                            sessions
-                        )
-                        lang_avg_score = (
-                            sum(s.get("score", 0) for s in sessions) / len(sessions)
-                            if all("score" in s for s in sessions)
-                            else 0
-                        )
-                        stats_content += f"  {lang}: {lang_avg_wpm:.1f} WPM, {lang_avg_accuracy:.1f}%, 점수: {lang_avg_score:.2f}점 ({len(sessions)}회)\n"
+                    for lang, lang_summary in summary["languages"].items():
+                        stats_content += f"  {lang}: {lang_summary['wpm']:.1f} WPM, {lang_summary['accuracy']:.1f}%, 점수: {lang_summary['score']:.2f}점 ({lang_summary['count']}회)\n"
+                        # 난이도별 (난이도가 하나뿐이면 언어 합계와 같으므로 생략)
+                        by_difficulty = summary["difficulties"].get(lang, {})
+                        if len(by_difficulty) > 1:
+                            for difficulty, level in by_difficulty.items():
+                                stats_content += f"    - {difficulty}: {level['wpm']:.1f} WPM, {level['accuracy']:.1f}%, 점수: {level['score']:.2f}점 ({level['count']}회)\n"
 
             stats_content += "\n최근 10회 연습 기록:\n"
             stats_content += "-" * 80 + "\n"
 
-            for i, session in enumerate(self.stats_data["sessions"][-10:], 1):
+            for i, session in enumerate(self.recent_sessions(10), 1):
                 mode = session.get("mode", "typing")
                 name = session.get("name", "Unknown")
                 lang_info = (
@@ -2548,7 +4757,17 @@ int main() {
                 stats_content += f"{i:2d}. [{name}] [{mode.upper()}{lang_info}{diff_info}] {session['wpm']:5.1f} WPM | {session['accuracy']:5.1f}% | 점수: {score:6.2f}점 | {session['time']:5.1f}초 | {session['date']}\n"
         else:
             stats_content += "아직 연습 기록이 없습니다.\n"
-            stats_content += "연습을 시작하여 통계를 쌓아보세요!"
+            stats_content += "연습을 시작하여 통계를 쌓아보세요!\n"
+
+        # 느린 키/바이그램 순위 (연습 모드/키 연습 세션도 누적되므로 점수 기록과 별개로 표시)
+        for title, table in (("키", self.key_stats.keys), ("바이그램", self.key_stats.bigrams)):
+            slowest = self.key_stats.slowest(table)
+            if slowest:
+                stats_content += f"\n가장 느린 {title} (5회 이상):\n"
+                stats_content += f"{'순위':<4} {'글자':<6} {'평균':>8} {'중앙값':>8} {'오타율':>7} {'횟수':>6}\n"
+                for i, (key, count, mean, median, error_rate) in enumerate(slowest, 1):
+                    shown = key.replace(" ", "␣").replace("\n", "⏎")
+                    stats_content += f"{i:<4} {shown:<6} {mean:6.0f}ms {median:6.0f}ms {error_rate:6.1f}% {count:6d}\n"
 
         stats_text.insert(1.0, stats_content)
         stats_text.config(state=tk.DISABLED)
@@ -2557,7 +4776,7 @@ int main() {
         """설정 창"""
         settings_window = tk.Toplevel(self.root)
         settings_window.title("설정")
-        settings_window.geometry("400x300")
+        settings_window.geometry("400x600")
         settings_window.resizable(False, False)
 
         tk.Label(settings_window, text="설정", font=("맑은 고딕", 16, "bold")).pack(
@@ -2577,17 +4796,194 @@ int main() {
         )
         clear_stats_btn.pack(pady=10)
 
+        # 화면 갱신 간격 (키 입력이 몰릴 때 위젯 갱신을 합치는 프레임 예산)
+        budget_frame = tk.Frame(options_frame)
+        budget_frame.pack(pady=10)
+        tk.Label(budget_frame, text="화면 갱신 간격(ms):").pack(side=tk.LEFT)
+        budget_var = tk.IntVar(value=self.frame_budget_ms)
+
+        def apply_frame_budget():
+            try:
+                self.frame_budget_ms = max(0, int(budget_var.get()))
+            except (tk.TclError, ValueError):
+                pass
+
+        budget_spinbox = tk.Spinbox(
+            budget_frame,
+            from_=0,
+            to=100,
+            width=5,
+            textvariable=budget_var,
+            command=apply_frame_budget,
+        )
+        budget_spinbox.pack(side=tk.LEFT, padx=(10, 0))
+        budget_spinbox.bind("<Return>", lambda e: apply_frame_budget())
+
+        # 입력 지연 진단 오버레이
+        latency_btn = tk.Button(
+            options_frame,
+            text="입력 지연 오버레이 켜기/끄기",
+            width=20,
+            command=self.toggle_latency_overlay,
+        )
+        latency_btn.pack(pady=10)
+
+        # 외부 단어 목록 불러오기 (빈도순 단어 목록, 한 줄에 한 단어)
+        word_list_btn = tk.Button(
+            options_frame,
+            text="단어 목록 불러오기",
+            width=20,
+            command=self.choose_word_list,
+        )
+        word_list_btn.pack(pady=10)
+
+        # 말뭉치 바꾸기 (말뭉치 연습에 쓸 긴 텍스트, 한 줄씩)
+        corpus_btn = tk.Button(
+            options_frame,
+            text="말뭉치 불러오기",
+            width=20,
+            command=self.choose_text_corpus,
+        )
+        corpus_btn.pack(pady=10)
+
+        # 고스트 레이스 (같은 텍스트의 최고 기록과 경쟁)
+        ghost_btn = tk.Button(options_frame, width=20)
+        ghost_btn.config(
+            text=self.ghost_race_button_text(),
+            command=lambda: self.toggle_ghost_race(ghost_btn),
+        )
+        ghost_btn.pack(pady=10)
+
+        # 마지막 세션 재생
+        replay_frame = tk.Frame(options_frame)
+        replay_frame.pack(pady=10)
+        replay_speed_var = tk.StringVar(value="1×")
+        ttk.Combobox(
+            replay_frame,
+            textvariable=replay_speed_var,
+            values=list(REPLAY_SPEEDS),
+            state="readonly",
+            width=5,
+        ).pack(side=tk.LEFT)
+        tk.Button(
+            replay_frame,
+            text="마지막 세션 재생",
+            command=lambda: self.replay_last_session(
+                REPLAY_SPEEDS[replay_speed_var.get()], settings_window
+            ),
+        ).pack(side=tk.LEFT, padx=(10, 0))
+
         # 정보 버튼
         info_btn = tk.Button(
             options_frame, text="프로그램 정보", width=20, command=self.show_info
         )
         info_btn.pack(pady=10)
 
+    def toggle_latency_overlay(self):
+        """입력 지연 진단 오버레이 켜기/끄기 (켜져 있는 동안만 샘플 기록)"""
+        if self.latency_recorder is None:
+            self.latency_recorder = LatencyRecorder()
+            self.show_latency_overlay()
+        else:
+            self.close_latency_overlay()
+
+    def show_latency_overlay(self):
+        """키 입력 → 화면 반영 지연의 백분위수와 분포를 보여주는 창"""
+        overlay = tk.Toplevel(self.root)
+        overlay.title("입력 지연 진단")
+        overlay.geometry("360x300")
+        overlay.resizable(False, False)
+        overlay.attributes("-topmost", True)
+        overlay.protocol("WM_DELETE_WINDOW", self.close_latency_overlay)
+
+        self.latency_label = tk.Label(
+            overlay, text="", font=("Consolas", 10), justify=tk.LEFT, anchor="w"
+        )
+        self.latency_label.pack(fill=tk.X, padx=10, pady=(10, 5))
+        self.latency_canvas = tk.Canvas(overlay, width=340, height=120, bg="white")
+        self.latency_canvas.pack(padx=10)
+        tk.Button(
+            overlay, text="샘플 저장 (CSV)", command=self.dump_latency_samples
+        ).pack(pady=10)
+
+        self.latency_overlay = overlay
+        self.refresh_latency_overlay()
+
+    def refresh_latency_overlay(self):
+        """오버레이 내용 갱신 (0.5초마다)"""
+        recorder = self.latency_recorder
+        if recorder is None or self.latency_overlay is None:
+            return
+
+        p50, p95, p99 = recorder.percentiles()
+        over_budget = sum(1 for value in recorder.values("total_ms") if value > self.frame_budget_ms)
+        lines = [
+            f"샘플 {recorder.recorded}개 (최근 {len(recorder.samples)}개 기준)",
+            f"전체   p50 {p50:6.2f}  p95 {p95:6.2f}  p99 {p99:6.2f} ms",
+            f"프레임 예산({self.frame_budget_ms}ms) 초과: {over_budget}회",
+        ]
+        labels = {
+            "wait_ms": "대기",
+            "syntax_ms": "하이라이팅",
+            "lines_ms": "입력 줄",
+            "stats_ms": "통계",
+            "progress_ms": "진행률",
+        }
+        for field, name in labels.items():
+            lines.append(f"{name:<6} p95 {recorder.percentiles(field)[1]:6.2f} ms")
+        self.latency_label.config(text="\n".join(lines))
+
+        # 지연 분포 막대 그래프 (프레임 예산 이내는 초록, 초과는 빨강)
+        canvas = self.latency_canvas
+        canvas.delete("all")
+        counts = recorder.histogram()
+        bounds = LATENCY_HISTOGRAM_BOUNDS
+        bar_width = 340 // len(counts)
+        tallest = max(counts) or 1
+        for i, count in enumerate(counts):
+            x0 = i * bar_width + 4
+            height = int(90 * count / tallest)
+            low = bounds[i - 1] if i > 0 else 0
+            color = "#4CAF50" if low < self.frame_budget_ms else "#F44336"
+            canvas.create_rectangle(
+                x0, 100 - height, x0 + bar_width - 8, 100, fill=color, outline=""
+            )
+            label = f"<{bounds[i]}" if i < len(bounds) else f"{bounds[-1]}+"
+            canvas.create_text(x0 + bar_width // 2 - 4, 110, text=label, font=("Arial", 8))
+
+        self.latency_overlay_job = self.root.after(500, self.refresh_latency_overlay)
+
+    def close_latency_overlay(self):
+        """오버레이 닫기 및 기록 중지"""
+        if self.latency_overlay_job is not None:
+            self.root.after_cancel(self.latency_overlay_job)
+            self.latency_overlay_job = None
+        if self.latency_overlay is not None:
+            self.latency_overlay.destroy()
+            self.latency_overlay = None
+        self.latency_recorder = None
+        self.pending_key_times = []
+
+    def dump_latency_samples(self):
+        """지연 샘플을 CSV 파일로 저장"""
+        if self.latency_recorder is None:
+            return
+        file_path = filedialog.asksaveasfilename(
+            title="지연 샘플 저장",
+            defaultextension=".csv",
+            filetypes=[("CSV 파일", "*.csv"), ("모든 파일", "*.*")],
+        )
+        if file_path:
+            try:
+                self.latency_recorder.dump(file_path)
+                messagebox.showinfo("완료", f"샘플 {len(self.latency_recorder.samples)}개를 저장했습니다.")
+            except OSError as e:
+                messagebox.showerror("오류", f"파일을 저장할 수 없습니다: {str(e)}")
+
     def clear_stats(self, window):
         """통계 초기화"""
         if messagebox.askyesno("확인", "모든 통계를 삭제하시겠습니까?"):
-            self.stats_data = {"sessions": []}
-            self.save_stats()
+            self.clear_session_records()
             messagebox.showinfo("완료", "통계가 초기화되었습니다.")
             window.destroy()
 
@@ -2613,37 +5009,90 @@ int main() {
 
         messagebox.showinfo("프로그램 정보", info_text)
 
+    @property
+    def stats_data(self):
+        """{"sessions": [...], "user_name": ...} (처음 접근할 때 통계 로드)"""
+        self.load_stats()
+        return self.stats.data
+
+    @property
+    def user_name(self):
+        self.load_stats()
+        return self.stats.user_name
+
+    @user_name.setter
+    def user_name(self, name):
+        self.load_stats()
+        self.stats.user_name = name
+
     def load_stats(self):
-        """통계 로드"""
-        try:
-            if os.path.exists(self.stats_file):
-                with open(self.stats_file, "r", encoding="utf-8") as file:
-                    data = json.load(file)
-                    # 이전 형식 호환성
-                    if "sessions" in data:
-                        self.stats_data = data
-                    else:
-                        self.stats_data = {
-                            "sessions": data if isinstance(data, list) else []
-                        }
-                    # 사용자 이름 로드
-                    if "user_name" in data:
-                        self.user_name = data["user_name"]
-            else:
-                self.stats_data = {"sessions": []}
-        except Exception as e:
-            self.stats_data = {"sessions": []}
+        """통계 로드 (처음 한 번만: 스냅샷 + 저널을 읽고 세션 색인을 맞춤)"""
+        if self.stats.loaded:
+            return
+        self.stats.load()
+        self.session_store = self.open_session_store()
 
     def save_stats(self):
-        """통계 저장"""
+        """통계 전체를 스냅샷으로 저장 (저널은 비움)"""
+        # user_name도 함께 저장, 세션 목록은 저장 스레드가 쓰는 동안 바뀌지 않도록 복사
+        data_to_save = self.stats_data.copy()
+        data_to_save["sessions"] = list(self.stats_data["sessions"])
+        data_to_save["user_name"] = self.user_name
+        data_to_save["aggregates"] = self.stats.aggregates.to_dict()
+        self.stats.journal.compact(data_to_save)
+        self.persistence.submit(self.stats.journal.write, key=self.stats_file)
+
+    def persist(self, store):
+        """path/dumps() 를 가진 저장소의 현재 내용을 저장 스레드로 넘김 (같은 파일은 마지막 것만 기록)"""
+        text = store.dumps()
+        if text is None:
+            return
+        path = store.path
+        self.persistence.submit(lambda: write_text_atomic(path, text), key=path)
+
+    def open_session_store(self):
+        """세션 색인 DB를 열고 JSON 기록과 맞춤 (처음 한 번은 전체 가져오기)"""
+        if sqlite3 is None:
+            return None
         try:
-            # user_name도 함께 저장
-            data_to_save = self.stats_data.copy()
-            data_to_save["user_name"] = self.user_name
-            with open(self.stats_file, "w", encoding="utf-8") as file:
-                json.dump(data_to_save, file, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"통계 저장 오류: {e}")
+            store = SessionStore(self.data_path(SESSION_DB_FILE))
+            store.sync(self.stats_data["sessions"])
+            return store
+        except sqlite3.Error as e:
+            print(f"세션 DB 오류: {e}")
+            return None
+
+    def stats_summary(self):
+        """통계 화면용 집계 (세션마다 갱신해 둔 누적값에서 바로 계산)"""
+        self.load_stats()
+        return self.stats.aggregates.summary()
+
+    def top_sessions(self, sort_key, limit=LEADERBOARD_LIMIT):
+        """점수판 정렬 기준 상위 세션"""
+        sessions = self.stats_data["sessions"]
+        if self.session_store:
+            result = self.session_store.top(sort_key, sessions, limit)
+            if result is not None:
+                return result
+        default = "" if sort_key == "date" else 0
+        sessions = sorted(
+            sessions,
+            key=lambda x: x.get(sort_key, default),
+            reverse=True,
+        )
+        return sessions[:limit]
+
+    def recent_sessions(self, limit):
+        """최근 세션 (오래된 것부터)"""
+        return self.stats_data["sessions"][-limit:]
+
+    def append_stats_entry(self, entry):
+        """저널에 한 줄 추가, 충분히 쌓였으면 스냅샷으로 합침"""
+        self.stats.journal.append(entry)
+        if self.stats.journal.needs_compaction():
+            self.save_stats()
+        else:
+            self.persistence.submit(self.stats.journal.write, key=self.stats_file)
 
     def calculate_score(self, wpm, accuracy, difficulty=None):
         """난이도별 배율을 적용한 점수 계산"""
@@ -2670,35 +5119,202 @@ int main() {
             "mode": "coding" if self.is_coding_mode else "typing",
             "language": self.current_language if self.is_coding_mode else None,
             "difficulty": difficulty if self.is_coding_mode else None,
+            # 같은 텍스트의 기록끼리 비교(고스트 레이스)하기 위한 해시
+            "text_hash": text_hash(self.session.text),
         }
+        # 키 입력 기록은 별도 압축 파일로 저장하고 경로만 남김
+        log_path = self.save_keystroke_log()
+        if log_path:
+            session_data["keystroke_log"] = log_path
+
+        self.stats.add_session(session_data)
+        self.append_stats_entry({"session": session_data})
+        if self.session_store:
+            self.persistence.submit(lambda: self.session_store.add(session_data))
+
+    def data_path(self, relative_path):
+        """통계 파일과 같은 폴더 기준 경로 (캐시/기록 파일 위치)"""
+        return os.path.join(
+            os.path.dirname(os.path.abspath(self.stats_file)), relative_path
+        )
 
-        self.stats_data["sessions"].append(session_data)
-        self.save_stats()
+    def keystroke_log_path(self, relative_path):
+        """통계 파일 기준 상대 경로를 실제 경로로 변환"""
+        return self.data_path(relative_path)
 
-    def load_user_name(self):
-        """사용자 이름 로드"""
+    def load_user_settings(self):
+        """사용자 설정 로드 (외부 단어 목록 경로 등)"""
         try:
-            if os.path.exists(self.stats_file):
-                with open(self.stats_file, "r", encoding="utf-8") as file:
-                    data = json.load(file)
-                    if "user_name" in data:
-                        self.user_name = data["user_name"]
-        except Exception:
-            pass
+            with open(self.data_path(USER_SETTINGS_FILE), "r", encoding="utf-8") as file:
+                settings = json.load(file)
+            return settings if isinstance(settings, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def save_user_settings(self):
+        """사용자 설정 저장"""
+        path = self.data_path(USER_SETTINGS_FILE)
+        text = json.dumps(self.user_settings, ensure_ascii=False, indent=2)
+        self.persistence.submit(lambda: write_text_atomic(path, text), key=path)
+
+    def load_word_list(self, path):
+        """외부 단어 목록(빈도순)을 연습 단어로 사용 - 상위 PRACTICE_WORD_LIMIT 개만 디코딩"""
+        corpus = WordCorpus.open(
+            path, self.data_path(CORPUS_CACHE_DIR), "words", self.persistence.submit
+        )
+        if len(corpus) == 0:
+            raise ValueError("단어 목록이 비어있습니다.")
+        self.word_corpus = corpus
+        self.practice_words = corpus[:PRACTICE_WORD_LIMIT]
 
-    def save_user_name(self):
-        """사용자 이름 저장"""
+    def choose_word_list(self):
+        """설정 창에서 단어 목록 파일 선택"""
+        file_path = filedialog.askopenfilename(
+            title="단어 목록 파일 선택",
+            filetypes=[("텍스트 파일", "*.txt"), ("모든 파일", "*.*")],
+        )
+        if not file_path:
+            return
         try:
-            if os.path.exists(self.stats_file):
-                with open(self.stats_file, "r", encoding="utf-8") as file:
-                    data = json.load(file)
-            else:
-                data = {"sessions": []}
-            data["user_name"] = self.user_name
-            with open(self.stats_file, "w", encoding="utf-8") as file:
-                json.dump(data, file, ensure_ascii=False, indent=2)
-        except Exception:
-            pass
+            self.load_word_list(file_path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("오류", f"단어 목록을 읽을 수 없습니다: {str(e)}")
+            return
+        self.user_settings["word_list"] = os.path.abspath(file_path)
+        self.save_user_settings()
+        messagebox.showinfo(
+            "완료",
+            f"단어 {len(self.word_corpus)}개를 불러왔습니다. (연습에는 상위 {len(self.practice_words)}개 사용)",
+        )
+
+    def load_text_corpus(self, path):
+        """긴 텍스트 말뭉치를 줄 단위로 열기 (연습마다 연속된 몇 줄만 디코딩)"""
+        corpus = WordCorpus.open(
+            path, self.data_path(CORPUS_CACHE_DIR), "lines", self.persistence.submit
+        )
+        if len(corpus) == 0:
+            raise ValueError("말뭉치가 비어있습니다.")
+        self.text_corpus = corpus
+
+    def choose_text_corpus(self):
+        """말뭉치 파일 선택 (불러왔으면 True)"""
+        file_path = filedialog.askopenfilename(
+            title="말뭉치 파일 선택",
+            filetypes=[("텍스트 파일", "*.txt"), ("모든 파일", "*.*")],
+        )
+        if not file_path:
+            return False
+        try:
+            self.load_text_corpus(file_path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("오류", f"말뭉치를 읽을 수 없습니다: {str(e)}")
+            return False
+        self.user_settings["text_corpus"] = os.path.abspath(file_path)
+        self.save_user_settings()
+        messagebox.showinfo("완료", f"말뭉치 {len(self.text_corpus)}줄을 불러왔습니다.")
+        return True
+
+    def generate_corpus_text(self, line_count=CORPUS_PRACTICE_LINES):
+        """말뭉치에서 임의 위치의 연속된 줄"""
+        start = random.randrange(max(1, len(self.text_corpus) - line_count + 1))
+        return "\n".join(self.text_corpus[start : start + line_count])
+
+    def start_corpus_practice(self):
+        """말뭉치 연습 시작 (저장된 말뭉치가 없으면 파일 선택)"""
+        if self.text_corpus is None:
+            corpus_path = self.user_settings.get("text_corpus")
+            if corpus_path and os.path.exists(corpus_path):
+                try:
+                    self.load_text_corpus(corpus_path)
+                except (OSError, ValueError) as e:
+                    print(f"말뭉치 로드 오류: {e}")
+        if self.text_corpus is None and not self.choose_text_corpus():
+            return
+        self.start_practice_mode(self.generate_corpus_text)
+
+    def load_practice_texts(self):
+        """practice_texts.txt 를 난이도별 문장 목록으로 읽음 ("초급 연습용 텍스트" 같은 줄이 구역 제목)"""
+        try:
+            corpus = WordCorpus.open(
+                self.resource_path("practice_texts.txt"),
+                self.data_path(CORPUS_CACHE_DIR),
+                "lines",
+                self.persistence.submit,
+            )
+        except OSError:
+            return {}
+        sections = {}
+        current = None
+        for line in corpus:
+            if line.endswith("연습용 텍스트"):
+                current = sections.setdefault(line.split()[0], [])
+            elif current is not None:
+                current.append(line)
+        return sections
+
+    def keystroke_log_header(self):
+        """키 입력 기록을 재생하는 데 필요한 세션 정보"""
+        return {
+            "text": self.session.text,
+            "mode": "coding" if self.is_coding_mode else "typing",
+            "language": self.current_language if self.is_coding_mode else None,
+        }
+
+    def save_keystroke_log(self):
+        """현재 세션의 키 입력 기록 저장 (통계 파일 기준 상대 경로 반환, 쓰기는 저장 스레드에서)"""
+        log = self.session.log
+        if len(log) == 0:
+            return None
+        relative_path = os.path.join(
+            KEYSTROKE_LOG_DIR, datetime.now().strftime("%Y%m%d-%H%M%S-%f") + ".keys.gz"
+        )
+        header = self.keystroke_log_header()
+        path = self.keystroke_log_path(relative_path)
+        # 파일이 다 쓰일 때까지는 메모리의 기록으로 재생/고스트를 처리
+        self.unsaved_keystroke_logs[relative_path] = (header, log)
+
+        def write():
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                log.save(path, header)
+            except OSError as e:
+                print(f"키 입력 기록 저장 오류: {e}")
+            self.unsaved_keystroke_logs.pop(relative_path, None)
+
+        self.persistence.submit(write)
+        return relative_path
+
+    def load_keystroke_log(self, relative_path):
+        """세션의 키 입력 기록 (header, log) - 아직 저장 중이면 메모리에 있는 것을 사용"""
+        unsaved = self.unsaved_keystroke_logs.get(relative_path)
+        if unsaved is not None:
+            return unsaved
+        return KeystrokeLog.load(self.keystroke_log_path(relative_path))
+
+    def clear_session_records(self):
+        """모든 세션 기록과 그에 딸린 키 입력 기록/키 통계 삭제"""
+        sessions = self.stats_data["sessions"]
+        self.persistence.submit(lambda: self.delete_keystroke_logs(sessions))
+        self.stats.clear()
+        self.save_stats()
+        if self.session_store:
+            self.persistence.submit(self.session_store.clear)
+        self.key_stats.clear()
+        self.persist(self.key_stats)
+
+    def delete_keystroke_logs(self, sessions):
+        """세션들이 참조하는 키 입력 기록 파일 삭제"""
+        for session in sessions:
+            relative_path = session.get("keystroke_log")
+            if relative_path:
+                try:
+                    os.remove(self.keystroke_log_path(relative_path))
+                except OSError:
+                    pass
+
+    def save_user_name(self):
+        """사용자 이름 저장 (저널에 한 줄 추가)"""
+        self.append_stats_entry({"user_name": self.user_name})
 
     def show_leaderboard(self):
         """점수판 UI 표시"""
@@ -2779,36 +5395,27 @@ int main() {
         leaderboard_listbox.pack(fill=tk.BOTH, expand=True)
 
         scrollbar.config(command=leaderboard_listbox.yview)
+        # 목록에 표시된 순서대로의 세션 (재생 버튼에서 선택한 줄과 대응)
+        displayed_sessions = []
 
         def update_leaderboard():
             leaderboard_listbox.delete(0, tk.END)
+            displayed_sessions.clear()
 
-            if not hasattr(self, "stats_data") or not self.stats_data.get("sessions"):
+            # 정렬 기준 상위 50개만 가져옴 (DB가 있으면 인덱스 질의)
+            sessions = self.top_sessions(sort_var.get())
+            if not sessions:
                 leaderboard_listbox.insert(
                     tk.END, "아직 기록이 없습니다. 연습을 시작해보세요!"
                 )
                 return
 
-            # 세션 복사 및 정렬
-            sessions = self.stats_data["sessions"].copy()
-            sort_key = sort_var.get()
-
-            if sort_key == "score":
-                sessions.sort(key=lambda x: x.get("score", 0), reverse=True)
-            elif sort_key == "wpm":
-                sessions.sort(key=lambda x: x.get("wpm", 0), reverse=True)
-            elif sort_key == "accuracy":
-                sessions.sort(key=lambda x: x.get("accuracy", 0), reverse=True)
-            elif sort_key == "date":
-                sessions.sort(key=lambda x: x.get("date", ""), reverse=True)
-
             # 헤더
             header = f"{'순위':<6} {'이름':<15} {'점수':<10} {'WPM':<8} {'정확도':<8} {'날짜':<20}"
             leaderboard_listbox.insert(tk.END, header)
             leaderboard_listbox.insert(tk.END, "-" * 80)
 
-            # 상위 50개만 표시
-            for i, session in enumerate(sessions[:50], 1):
+            for i, session in enumerate(sessions, 1):
                 name = session.get("name", "Unknown")
                 score = session.get("score", 0)
                 wpm = session.get("wpm", 0)
@@ -2823,6 +5430,7 @@ int main() {
 
                 row = f"{prefix}{i:<4} {name:<15} {score:<10.2f} {wpm:<8.1f} {accuracy:<8.1f}% {date}"
                 leaderboard_listbox.insert(tk.END, row)
+                displayed_sessions.append(session)
 
         # 하단 버튼 프레임
         button_frame = tk.Frame(leaderboard_window, bg="#1a1a1a")
@@ -2834,8 +5442,7 @@ int main() {
                 "확인",
                 "모든 점수 기록을 삭제하시겠습니까?\n이 작업은 되돌릴 수 없습니다.",
             ):
-                self.stats_data = {"sessions": []}
-                self.save_stats()
+                self.clear_session_records()
                 messagebox.showinfo("완료", "점수판이 초기화되었습니다.")
                 update_leaderboard()  # 점수판 새로고침
 
@@ -2854,6 +5461,42 @@ int main() {
         )
         reset_button.pack(side=tk.RIGHT, padx=5)
 
+        # 선택한 기록 재생 (헤더 두 줄 다음부터 세션)
+        def replay_selected():
+            selection = leaderboard_listbox.curselection()
+            index = selection[0] - 2 if selection else -1
+            if not 0 <= index < len(displayed_sessions):
+                messagebox.showinfo("알림", "재생할 기록을 선택하세요.")
+                return
+            self.replay_session_entry(
+                displayed_sessions[index],
+                REPLAY_SPEEDS[replay_speed_var.get()],
+                leaderboard_window,
+            )
+
+        replay_speed_var = tk.StringVar(value="1×")
+        ttk.Combobox(
+            button_frame,
+            textvariable=replay_speed_var,
+            values=list(REPLAY_SPEEDS),
+            state="readonly",
+            width=5,
+        ).pack(side=tk.LEFT, padx=5)
+        replay_button = tk.Button(
+            button_frame,
+            text="재생",
+            font=("맑은 고딕", 12),
+            bg="#2d2d2d",
+            fg="#00ff00",
+            activebackground="#3d3d3d",
+            activeforeground="#00ff00",
+            relief="flat",
+            padx=20,
+            pady=8,
+            command=replay_selected,
+        )
+        replay_button.pack(side=tk.LEFT, padx=5)
+
         # 새로고침 버튼
         refresh_button = tk.Button(
             button_frame,
@@ -2873,11 +5516,30 @@ int main() {
         # 초기 로드
         update_leaderboard()
 
+    def on_close(self):
+        """프로그램 종료 (캐시 저장 후 창 닫기)"""
+        self.persist(self.highlight_cache)
+        # 남은 저장을 모두 마친 뒤 종료
+        self.persistence.close()
+        if self.session_store:
+            self.session_store.close()
+        self.root.destroy()
+
     def run(self):
         """프로그램 실행"""
         self.root.mainloop()
 
 
 if __name__ == "__main__":
+    # 빌드 시 하이라이트 캐시 미리 생성: python main.py --build-highlight-cache [출력 경로]
+    if len(sys.argv) > 1 and sys.argv[1] == "--build-highlight-cache":
+        output = sys.argv[2] if len(sys.argv) > 2 else HIGHLIGHT_CACHE_FILE
+        templates_path = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "coding_templates.json"
+        )
+        count = build_highlight_cache(templates_path, output)
+        print(f"하이라이트 캐시 생성 완료: {output} ({count}개 항목)")
+        sys.exit(0)
+
     app = DvorakTypingTrainer()
     app.run()